@@ -1,3 +1,4 @@
+import multiprocessing
 import os
 import re
 import requests
@@ -6,15 +7,63 @@ import pandas as pd
 from tkinter import filedialog, messagebox
 from lxml import etree
 from openpyxl import load_workbook
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from openpyxl.styles import Font, NamedStyle
 from docx import Document
 from collections import Counter
+from hedge import Hedged
+from word_cache import WordCache
+
+WORDLIST_FILE = 'wordlist.txt'
+REQUEST_TIMEOUT = (3.05, 10)  # 连接超时、读取超时（秒）
+WORKBOOK_WORKERS = os.cpu_count() or 1  # 并行生成工作簿的进程数
+
+
+def save_workbook(output_file, rows):
+    # 在子进程中运行：rows为 (单词, 查询结果, 词频)，查询已在主进程完成
+    # 导出到Excel
+    df = pd.DataFrame([word for word, _, _ in rows], columns=['Words'])
+    df['Word Count'] = [count for _, _, count in rows]
+    df.to_excel(output_file, index=False)
+
+    # 打开Excel文件
+    workbook = load_workbook(output_file)
+    worksheet = workbook.active
+    worksheet.cell(row=1, column=2, value="British Pronunciation")
+    worksheet.cell(row=1, column=3, value="American Pronunciation")
+    worksheet.cell(row=1, column=4, value="Paraphrase")
+    worksheet.cell(row=1, column=5, value="Word Count")
+
+    # 设置标题加粗
+    bold_style = NamedStyle(name="bold_style")
+    bold_style.font = Font(bold=True)
+    worksheet.cell(row=1, column=2).style = bold_style
+    worksheet.cell(row=1, column=3).style = bold_style
+    worksheet.cell(row=1, column=4).style = bold_style
+    worksheet.cell(row=1, column=5).style = bold_style
+
+    for row_index, (word, word_info, count) in enumerate(rows, start=2):
+        if word_info:
+            british_pronunciation, american_pronunciation, paraphrase = word_info
+            worksheet.cell(row=row_index, column=2).value = british_pronunciation
+            worksheet.cell(row=row_index, column=3).value = american_pronunciation
+            worksheet.cell(row=row_index, column=4).value = paraphrase
+
+        # 填充词频
+        worksheet.cell(row=row_index, column=5).value = count
+
+    # 保存修改后的Excel文件
+    workbook.save(output_file)
 
 
 class EnglishWordProcessor:
     def __init__(self):
         self.file_paths = []
+        self.cache = WordCache()
+        # 超过p95耗时还没返回的请求再发一次，取先返回的
+        self.hedged_fetch = Hedged(self.fetch_word_info)
+        if os.path.exists(WORDLIST_FILE):
+            self.cache.build_bloom(WORDLIST_FILE)
 
     def browse_files(self):
         self.file_paths = filedialog.askopenfilenames(filetypes=[('Text Files', '*.txt'), ('Word Files', '*.docx')],
@@ -39,109 +88,90 @@ class EnglishWordProcessor:
 
         self.execute_button.config(state=tk.NORMAL)
 
-    def get_word_info(self, word):
+    @staticmethod
+    def fetch_word_info(word):
         # 构造请求URL
         url = f'https://www.youdao.com/w/eng/{word}'
 
+        paraphrase = ""
+        response = requests.get(url, timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        html = etree.HTML(response.text)
+        british_pronunciation = html.xpath('//*[@id="phrsListTab"]/h2/div/span[1]/span/text()')
+        american_pronunciation = html.xpath('//*[@id="phrsListTab"]/h2/div/span[2]/span/text()')
+        if not british_pronunciation or not american_pronunciation:
+            # 有道查不到该单词
+            return None
+        li_elements = html.xpath('//*[@id="phrsListTab"]/div/ul')
+        for li in li_elements:
+            paraphrase = ''.join(li.xpath('.//text()'))
+        return british_pronunciation[0], american_pronunciation[0], paraphrase
+
+    def get_word_info(self, word):
         try:
-            paraphrase = ""
-            data = requests.get(url).text
-            html = etree.HTML(data)
-            british_pronunciation = html.xpath('//*[@id="phrsListTab"]/h2/div/span[1]/span/text()')[0]
-            american_pronunciation = html.xpath('//*[@id="phrsListTab"]/h2/div/span[2]/span/text()')[0]
-            li_elements = html.xpath('//*[@id="phrsListTab"]/div/ul')
-            for li in li_elements:
-                paraphrase = ''.join(li.xpath('.//text()'))
-            return british_pronunciation, american_pronunciation, paraphrase
+            # 先查缓存，查不到的单词记入负向缓存，下次不再请求
+            return self.cache.lookup(word, self.hedged_fetch)
         except Exception as e:
             print(e, word)
             return None
 
-    def process_text_files(self, file_paths):
-        for file_path in file_paths:
-            content = ""
-            # 读取文本文件
-            if file_path.endswith('.txt'):
-                with open(file_path, 'r', encoding='utf-8') as file:
-                    content = file.read()
-            elif file_path.endswith('.docx'):
-                doc = Document(file_path)
-                content = ' '.join([p.text for p in doc.paragraphs])
-
-            # 将内容分隔为单词列表
-            words = re.split(r'[^a-zA-Z\']+', content)
-
-            # 全部转换为小写
-            lowercase_words = [word.lower() for word in words]
-
-            # 去重
-            unique_words = list(set(lowercase_words))
-
-            # 排序
-            sorted_words = sorted(unique_words)
-
-            # 清洗
-            filtered_words = [word for word in sorted_words if
-                              len(word) > 2 and "'" not in word and not re.search(r'[\u4e00-\u9fff]', word) and not re.search(r'\d', word)]
-
-            # 统计单词词频
-            word_counts = Counter(lowercase_words)
-
-            # 导出到Excel
-            df = pd.DataFrame(filtered_words, columns=['Words'])
-            df['Word Count'] = df['Words'].map(word_counts)
-            output_file = file_path.replace('.txt', '.xlsx').replace('.docx', '.xlsx')
-            df.to_excel(output_file, index=False)
-
-            # 打开Excel文件
-            workbook = load_workbook(output_file)
-            worksheet = workbook.active
-            worksheet.cell(row=1, column=2, value="British Pronunciation")
-            worksheet.cell(row=1, column=3, value="American Pronunciation")
-            worksheet.cell(row=1, column=4, value="Paraphrase")
-            worksheet.cell(row=1, column=5, value="Word Count")
-
-            # 设置标题加粗
-            bold_style = NamedStyle(name="bold_style")
-            bold_style.font = Font(bold=True)
-            worksheet.cell(row=1, column=2).style = bold_style
-            worksheet.cell(row=1, column=3).style = bold_style
-            worksheet.cell(row=1, column=4).style = bold_style
-            worksheet.cell(row=1, column=5).style = bold_style
-
-            # 使用线程池处理请求
-            with ThreadPoolExecutor() as executor:
-                futures = [executor.submit(self.get_word_info, word) for word in filtered_words]
-
-                # 遍历每个单元格,获取单词并添加发音和释义
-                row_index = 2
-                for future, row in zip(futures, worksheet.iter_rows(min_row=2, max_col=5)):
-                    word = row[0].value
-                    word_info = future.result()
-
-                    if word_info:
-                        british_pronunciation, american_pronunciation, paraphrase = word_info
-                        worksheet.cell(row=row_index, column=2).value = british_pronunciation
-                        worksheet.cell(row=row_index, column=3).value = american_pronunciation
-                        worksheet.cell(row=row_index, column=4).value = paraphrase
-                    else:
-                        # 尝试移除后缀再查询
-                        if word.endswith(('s', 'ed', 'ing')):
-                            word_without_suffix = re.sub(r'(s|d|ing)$', '', word)
-                            word_info = self.get_word_info(word_without_suffix)
-                            if word_info:
-                                british_pronunciation, american_pronunciation, paraphrase = word_info
-                                worksheet.cell(row=row_index, column=2).value = british_pronunciation
-                                worksheet.cell(row=row_index, column=3).value = american_pronunciation
-                                worksheet.cell(row=row_index, column=4).value = paraphrase
-
-                    # 填充词频
-                    worksheet.cell(row=row_index, column=5).value = word_counts[word]
-
-                    row_index += 1
-
-            # 保存修改后的Excel文件
-            workbook.save(output_file)
+    def lookup_words(self, words):
+        # 使用线程池处理请求，哪个单词先查完就先处理，个别慢的单词不会阻塞后面的单词
+        results = {}
+        with ThreadPoolExecutor() as executor:
+            futures = {executor.submit(self.get_word_info, word): word for word in words}
+            for future in as_completed(futures):
+                word = futures[future]
+                word_info = future.result()
+                # 尝试移除后缀再查询
+                if not word_info and word.endswith(('s', 'ed', 'ing')):
+                    word_without_suffix = re.sub(r'(s|d|ing)$', '', word)
+                    word_info = self.get_word_info(word_without_suffix)
+                results[word] = word_info
+        return results
+
+    def process_text_files(self, file_paths, workers=WORKBOOK_WORKERS):
+        # 查询都在主进程中进行；工作簿交给进程池生成、保存，与下一个文件的查询重叠
+        # 主进程已有查询线程，子进程用spawn启动，不fork带着线程和锁的进程
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            futures = []
+            for file_path in file_paths:
+                content = ""
+                # 读取文本文件
+                if file_path.endswith('.txt'):
+                    with open(file_path, 'r', encoding='utf-8') as file:
+                        content = file.read()
+                elif file_path.endswith('.docx'):
+                    doc = Document(file_path)
+                    content = ' '.join([p.text for p in doc.paragraphs])
+
+                # 将内容分隔为单词列表
+                words = re.split(r'[^a-zA-Z\']+', content)
+
+                # 全部转换为小写
+                lowercase_words = [word.lower() for word in words]
+
+                # 去重
+                unique_words = list(set(lowercase_words))
+
+                # 排序
+                sorted_words = sorted(unique_words)
+
+                # 清洗
+                filtered_words = [word for word in sorted_words if
+                                  len(word) > 2 and "'" not in word and not re.search(r'[\u4e00-\u9fff]', word) and not re.search(r'\d', word)]
+
+                # 统计单词词频
+                word_counts = Counter(lowercase_words)
+
+                results = self.lookup_words(filtered_words)
+                rows = [(word, results[word], word_counts[word]) for word in filtered_words]
+                output_file = file_path.replace('.txt', '.xlsx').replace('.docx', '.xlsx')
+                futures.append(pool.submit(save_workbook, output_file, rows))
+
+            # 按输入顺序等待完成，子进程中的异常在这里抛出
+            for future in futures:
+                future.result()
 
     def run(self):
         # 创建主窗口
@@ -0,0 +1,171 @@
+"""
+单词统计：读取txt/docx -> 分词清洗统计 -> 查询音标释义 -> 写入同名.xlsx
+按配置组装 pipeline.py 中的各个阶段；图形界面（article2words v2.0.py、pyqt版.py）、监视文件夹（watch_folder.py）
+和命令行都调用这里的 process_files / process_file
+
+命令行用法: python article2words.py a.txt b.docx [--force] [--time-budget 秒] [--request-budget 次数] [--workers 进程数]
+
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import threading
+
+from audio import AudioStore
+from corpus_db import CorpusDB
+from fuzzy_match import SymSpell
+from manifest import Manifests
+from ngrams import STOPWORDS
+from page_archive import PageArchive
+from pipeline import (AudioStage, CorpusSink, CountStage, EnrichStage, FileSource, FilterStage, IndexStage,
+                      ManifestSink, Pipeline, PhraseStage, ReadStage, SkipUnchanged, TokenizeStage, VectorizedStage,
+                      WorkbookSink)
+from rank_table import RANK_FILE, load as load_rank_table
+from scheduler import Budget
+from word_cache import WordCache, load_wordlist
+from words import load_known_words
+from youdao import get_word_info
+
+PIPELINE_VERSION = 1  # 输出格式变化时加1，清单中旧版本的结果会重新生成
+WORDLIST_FILE = 'wordlist.txt'
+KNOWN_WORDS_FILE = 'known_words.txt'
+EXCLUDE_KNOWN = True  # 熟词是否从结果中排除；False则保留熟词及词频，但不查询
+VECTORIZED = False  # 大文件可改为True，用NumPy按字节向量化分词、清洗和统计（不添加例句列时生效）
+TIME_BUDGET = None  # 本次运行的时间预算（秒），None为不限
+REQUEST_BUDGET = None  # 本次运行的查询次数预算，None为不限
+PHRASES = True  # 是否统计高频短语，写入Phrases工作表
+PHRASE_TOP_K = 100
+PHRASE_EPSILON = 0.0001  # count-min sketch的误差上限（占短语总数的比例），越小占用内存越多
+PHRASE_DELTA = 0.01  # 误差超过上限的概率
+PARSE_IN_PROCESSES = True  # 页面解析交给进程池，查询并发高时解析不再受限于单核
+ARCHIVE_PAGES = False  # 是否归档原始页面，有道改版后可用 page_archive.py reextract 重新解析
+EXAMPLES = 'shortest'  # 例句列：'first' 第一次出现的句子，'shortest' 最短的句子，None 不添加
+AUDIO = False  # 是否下载英音、美音发音，并在表中添加链接
+CORPUS = False  # 是否把每篇文章的词频记入语料库（corpus.db），可用 corpus_db.py 查询
+WORKBOOK_WORKERS = os.cpu_count() or 1  # 生成、保存工作簿的进程数，1为在主进程中逐个生成
+CORRECTIONS = True  # 查不到的单词在缓存词头和离线词表中模糊匹配，纠正后的单词写入Correction列
+
+cache = WordCache()
+if os.path.exists(WORDLIST_FILE):
+    cache.build_bloom(WORDLIST_FILE)
+
+archive = PageArchive() if ARCHIVE_PAGES else None
+audio_store = AudioStore() if AUDIO else None
+corpus = CorpusDB() if CORPUS else None
+# 有 ranks.bin 时添加Rank、Level列，用 rank_table.py build 生成
+ranks = load_rank_table(RANK_FILE)
+known_words = load_known_words(KNOWN_WORDS_FILE) if os.path.exists(KNOWN_WORDS_FILE) else frozenset()
+_corrector = None
+_corrector_lock = threading.Lock()
+
+
+def config_fingerprint():
+    # 影响输出内容的配置
+    config = {
+        'version': PIPELINE_VERSION,
+        'exclude_known': EXCLUDE_KNOWN,
+        'known_words': hashlib.sha256('\n'.join(sorted(known_words)).encode('utf-8')).hexdigest(),
+        'phrases': PHRASES,
+        'phrase_top_k': PHRASE_TOP_K,
+        'phrase_epsilon': PHRASE_EPSILON,
+        'phrase_delta': PHRASE_DELTA,
+        'audio': AUDIO,
+        'examples': EXAMPLES,
+        'ranks': os.stat(RANK_FILE).st_mtime if ranks else None,
+        'corrections': CORRECTIONS,
+    }
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+fingerprint = config_fingerprint()
+
+
+class WordInfo:
+
+    def __init__(self, word):
+        self.word = word
+
+    @staticmethod
+    def fetch(word):
+        return get_word_info(word, archive, offload=PARSE_IN_PROCESSES)
+
+    def get_info(self, budget=None):
+        # 查不到返回None；网络错误、预算用完抛出异常，由schedule_lookups把单词留作待查询，不当作查不到
+        return cache.lookup(self.word, self.fetch, budget)
+
+
+def lookup(word, budget=None):
+    return WordInfo(word).get_info(budget)
+
+
+def corrector():
+    # 第一次有单词查不到时才建立模糊匹配索引
+    global _corrector
+    with _corrector_lock:
+        if _corrector is None:
+            _corrector = SymSpell(ranks=ranks)
+            _corrector.update(cache.headwords())
+            if os.path.exists(WORDLIST_FILE):
+                _corrector.update(load_wordlist(WORDLIST_FILE))
+        return _corrector
+
+
+def build_pipeline(file_paths, budget=None, force=False, workbook_workers=WORKBOOK_WORKERS):
+    excluded = known_words if EXCLUDE_KNOWN else frozenset()
+    manifests = Manifests()
+    # 读取、分词在独立线程中进行，与上一个文件的查询、写入重叠
+    stages = [SkipUnchanged(fingerprint, manifests, force), ReadStage(mode='thread')]
+    if EXAMPLES:
+        # 索引的一次遍历同时得到词频，不再单独分词、计数
+        stages += [IndexStage(), FilterStage(excluded)]
+    elif VECTORIZED:
+        stages.append(VectorizedStage(excluded))
+    else:
+        stages += [TokenizeStage(), CountStage(), FilterStage(excluded)]
+    if PHRASES:
+        # 以停用词或已掌握的单词开头、结尾的短语不统计
+        stages.append(PhraseStage(PHRASE_TOP_K, PHRASE_EPSILON, PHRASE_DELTA, excluded=STOPWORDS | excluded))
+    stages.append(EnrichStage(lookup, budget, skip=known_words, corrector=corrector if CORRECTIONS else None,
+                              mode='thread'))
+    if AUDIO:
+        stages.append(AudioStage(audio_store, mode='thread'))
+    # 查询在主进程中统一进行，各文件的工作簿在进程池中并行生成，完成顺序与输入顺序一致
+    workbook_mode = 'process' if workbook_workers > 1 else 'inline'
+    stages += [WorkbookSink(skip=known_words, shortest_example=EXAMPLES == 'shortest', ranks=ranks,
+                            mode=workbook_mode, workers=workbook_workers),
+               ManifestSink(fingerprint, manifests)]
+    if CORPUS:
+        stages.append(CorpusSink(corpus))
+    return Pipeline(FileSource(file_paths), stages)
+
+
+def process_files(file_paths, budget=None, force=False, workbook_workers=WORKBOOK_WORKERS):
+    # 生成器，按输入顺序每处理完一个文件返回其输出文件路径
+    for doc in build_pipeline(file_paths, budget, force, workbook_workers).run():
+        yield doc.output
+
+
+def process_file(file_path, budget=None, force=False):
+    # 单个文件不需要进程池
+    return next(process_files([file_path], budget, force, workbook_workers=1))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('files', nargs='+')
+    parser.add_argument('--force', action='store_true', help='忽略清单，全部重新生成')
+    parser.add_argument('--time-budget', type=float, default=TIME_BUDGET)
+    parser.add_argument('--request-budget', type=int, default=REQUEST_BUDGET)
+    parser.add_argument('--workers', type=int, default=WORKBOOK_WORKERS, help='生成工作簿的进程数')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    budget = Budget(args.time_budget, args.request_budget)
+    for output_file in process_files(args.files, budget, args.force, args.workers):
+        print(output_file)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+下载单词的英音、美音发音
+1、共用一个带连接池的requests.Session，多线程并发下载
+2、按内容哈希存放（audio/ab/abcdef....mp3），内容相同的文件只存一份
+3、index.db 记录 单词+口音 -> 内容哈希，已下载过的单词不再请求
+
+"""
+import hashlib
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+AUDIO_DIR = 'audio'
+AUDIO_URL = 'https://dict.youdao.com/dictvoice?audio={}&type={}'
+ACCENTS = {'uk': 1, 'us': 2}
+MAX_WORKERS = 16
+
+
+class AudioStore:
+
+    def __init__(self, path=AUDIO_DIR, max_workers=MAX_WORKERS):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.max_workers = max_workers
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(path, 'index.db'), check_same_thread=False)
+        with self.conn:
+            self.conn.execute('CREATE TABLE IF NOT EXISTS audio (word TEXT, accent TEXT, digest TEXT, '
+                              'PRIMARY KEY (word, accent))')
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def blob_path(self, digest):
+        return os.path.join(self.path, digest[:2], digest + '.mp3')
+
+    def get(self, word, accent):
+        with self.lock:
+            row = self.conn.execute('SELECT digest FROM audio WHERE word = ? AND accent = ?', (word, accent)).fetchone()
+        if row and os.path.exists(self.blob_path(row[0])):
+            return self.blob_path(row[0])
+        return None
+
+    def download(self, word, accent):
+        path = self.get(word, accent)
+        if path:
+            return path
+
+        response = self.session.get(AUDIO_URL.format(word, ACCENTS[accent]), timeout=30)
+        response.raise_for_status()
+        if not response.content:
+            return None
+        digest = hashlib.sha256(response.content).hexdigest()
+        path = self.blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # 每次下载用各自的临时文件，两个线程同时写同一内容时不会互相覆盖、删除
+            with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), suffix='.tmp', delete=False) as file:
+                file.write(response.content)
+            try:
+                os.replace(file.name, path)
+            except OSError:
+                os.remove(file.name)
+                raise
+        with self.lock, self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO audio VALUES (?, ?, ?)', (word, accent, digest))
+        return path
+
+    def _download(self, word, accent):
+        # 返回 (文件, 是否失败)；有道没有该发音时文件为None，但不算失败
+        try:
+            return self.download(word, accent), False
+        except Exception:
+            logging.exception(f'下载"{word}"的{accent}发音失败')
+            return None, True
+
+    def download_all(self, words):
+        # 返回 {单词: (英音文件, 美音文件)}, 有发音下载失败的单词集合
+        words = list(words)
+        with ThreadPoolExecutor(self.max_workers) as executor:
+            uk = executor.map(self._download, words, ['uk'] * len(words))
+            us = executor.map(self._download, words, ['us'] * len(words))
+            audio, failed = {}, set()
+            for word, (uk_file, uk_failed), (us_file, us_failed) in zip(words, uk, us):
+                audio[word] = uk_file, us_file
+                if uk_failed or us_failed:
+                    failed.add(word)
+            return audio, failed
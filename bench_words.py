@@ -0,0 +1,77 @@
+"""
+对比循环版和向量化版的清洗、词频统计
+用法: python bench_words.py --tokens 100000000 --chunk 5000000
+语料按Zipf分布随机生成，分块处理后合并结果，同时校验两种方式的结果一致
+
+"""
+import argparse
+import random
+import string
+import time
+from collections import Counter
+
+from words import clean_words, get_word_counts, parse_text
+from words_vectorized import clean_and_count_vectorized
+
+
+def make_vocabulary(size, seed):
+    rng = random.Random(seed)
+    vocabulary = []
+    for _ in range(size):
+        word = ''.join(rng.choice(string.ascii_letters) for _ in range(rng.randint(1, 18)))
+        if rng.random() < 0.02:
+            word += "'s"
+        vocabulary.append(word)
+    return vocabulary
+
+
+def make_chunk(vocabulary, weights, tokens, rng):
+    return ' '.join(rng.choices(vocabulary, weights, k=tokens)) + ', 2023. '
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tokens', type=int, default=100_000_000)
+    parser.add_argument('--chunk', type=int, default=5_000_000)
+    parser.add_argument('--vocabulary', type=int, default=200_000)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    vocabulary = make_vocabulary(args.vocabulary, args.seed)
+    weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+    rng = random.Random(args.seed)
+
+    loop_time = vector_time = 0.0
+    loop_words, vector_words = set(), set()
+    loop_counts, vector_counts = Counter(), Counter()
+
+    remaining = args.tokens
+    while remaining > 0:
+        size = min(args.chunk, remaining)
+        remaining -= size
+        text = make_chunk(vocabulary, weights, size, rng)
+
+        start = time.perf_counter()
+        words = parse_text(text)
+        loop_words.update(clean_words(words))
+        loop_counts.update(get_word_counts(words))
+        loop_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        cleaned, counts = clean_and_count_vectorized(text)
+        vector_words.update(cleaned)
+        vector_counts.update(counts)
+        vector_time += time.perf_counter() - start
+
+    # re.split在文本首尾是分隔符时会产生空字符串，向量化版不统计
+    loop_counts.pop('', None)
+    assert sorted(loop_words) == sorted(vector_words), '清洗结果不一致'
+    assert loop_counts == vector_counts, '词频结果不一致'
+
+    print(f'单词数: {args.tokens}, 清洗后词汇量: {len(loop_words)}')
+    print(f'循环版: {loop_time:.2f}s')
+    print(f'向量化: {vector_time:.2f}s ({loop_time / vector_time:.2f}x)')
+
+
+if __name__ == '__main__':
+    main()
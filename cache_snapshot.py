@@ -0,0 +1,138 @@
+"""
+查询缓存快照：从一台机器导出，在新机器上秒级导入，避免新环境重新请求有道
+文件格式（版本1）：
+  头部   b'A2WS' + 版本号(u16)
+  数据块 按单词排序，每BLOCK_SIZE条记录一块，JSON后zlib压缩
+  索引   每块的 (第一个单词, 偏移, 长度)，JSON后zlib压缩
+  尾部   索引偏移(u64) + 索引长度(u32) + 记录数(u32) + b'A2WS'
+有索引，查单个单词只需解压一个数据块
+
+用法:
+  python cache_snapshot.py export snapshot.a2ws
+  python cache_snapshot.py import snapshot.a2ws
+  python cache_snapshot.py prewarm 词频表.txt [--workers 16]
+
+"""
+import argparse
+import bisect
+import json
+import logging
+import struct
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from word_cache import CACHE_FILE, WordCache
+
+MAGIC = b'A2WS'
+VERSION = 1
+BLOCK_SIZE = 1024
+HEADER = struct.Struct('<4sH')
+FOOTER = struct.Struct('<QII4s')
+
+
+def export_snapshot(cache, path):
+    rows = cache.dump()
+    index = []
+    with open(path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION))
+        for start in range(0, len(rows), BLOCK_SIZE):
+            block = rows[start:start + BLOCK_SIZE]
+            data = zlib.compress(json.dumps(block, ensure_ascii=False).encode('utf-8'), 9)
+            index.append((block[0][0], file.tell(), len(data)))
+            file.write(data)
+        index_data = zlib.compress(json.dumps(index, ensure_ascii=False).encode('utf-8'), 9)
+        index_offset = file.tell()
+        file.write(index_data)
+        file.write(FOOTER.pack(index_offset, len(index_data), len(rows), MAGIC))
+    return len(rows)
+
+
+class SnapshotReader:
+
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        magic, version = HEADER.unpack(self.file.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f'{path} 不是缓存快照文件')
+        if version > VERSION:
+            raise ValueError(f'快照版本{version}高于当前支持的版本{VERSION}，请升级程序')
+        self.file.seek(-FOOTER.size, 2)
+        index_offset, index_length, self.count, _ = FOOTER.unpack(self.file.read(FOOTER.size))
+        self.file.seek(index_offset)
+        self.index = json.loads(zlib.decompress(self.file.read(index_length)))
+        self.first_words = [entry[0] for entry in self.index]
+
+    def read_block(self, i):
+        _, offset, length = self.index[i]
+        self.file.seek(offset)
+        return [tuple(row) for row in json.loads(zlib.decompress(self.file.read(length)))]
+
+    def __iter__(self):
+        for i in range(len(self.index)):
+            yield from self.read_block(i)
+
+    def get(self, word):
+        i = bisect.bisect_right(self.first_words, word) - 1
+        if i < 0:
+            return None
+        for row in self.read_block(i):
+            if row[0] == word:
+                return row
+        return None
+
+    def close(self):
+        self.file.close()
+
+
+def import_snapshot(cache, path):
+    reader = SnapshotReader(path)
+    try:
+        return cache.load(list(reader))
+    finally:
+        reader.close()
+
+
+def prewarm(cache, wordlist_path, workers=16):
+    # 词频表每行一个单词，可以带词频（"word 123"），按表中顺序查询
+    from youdao import get_word_info
+
+    with open(wordlist_path, 'r', encoding='utf-8') as file:
+        words = [line.split()[0].lower() for line in file if line.strip()]
+
+    def lookup(word):
+        try:
+            return cache.lookup(word, get_word_info)
+        except Exception:
+            logging.exception(f'获取单词"{word}" 失败')
+            return None
+
+    with ThreadPoolExecutor(workers) as executor:
+        found = sum(1 for word_info in executor.map(lookup, words) if word_info)
+    return found, len(words) - found
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('command', choices=['export', 'import', 'prewarm'])
+    parser.add_argument('file')
+    parser.add_argument('--cache', default=CACHE_FILE)
+    parser.add_argument('--workers', type=int, default=16)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    cache = WordCache(args.cache)
+    start = time.perf_counter()
+    if args.command == 'export':
+        print(f'导出{export_snapshot(cache, args.file)}条记录')
+    elif args.command == 'import':
+        hits, misses = import_snapshot(cache, args.file)
+        print(f'导入{hits}个单词，{misses}个查不到的单词')
+    else:
+        found, missed = prewarm(cache, args.file, args.workers)
+        print(f'预热完成: 查到{found}个，查不到{missed}个')
+    print(f'用时{time.perf_counter() - start:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
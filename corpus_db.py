@@ -0,0 +1,133 @@
+"""
+语料词频库：每处理一篇文章，把该文章的词频批量写入本地SQLite，便于跨文章统计
+支持：全部文章的高频词、文档频率（出现在多少篇文章中）、单篇文章的TF-IDF、词汇量随时间的增长
+
+用法:
+  python corpus_db.py top [--n 50] [--since 2026-10-01] [--until 2026-11-01]
+  python corpus_db.py df [--n 50] [--since ...] [--until ...]
+  python corpus_db.py tfidf 文章路径 [--n 50]
+  python corpus_db.py growth
+
+"""
+import argparse
+import math
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+CORPUS_FILE = 'corpus.db'
+
+
+class CorpusDB:
+
+    def __init__(self, path=CORPUS_FILE):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.conn:
+            self.conn.execute('CREATE TABLE IF NOT EXISTS documents (id INTEGER PRIMARY KEY, path TEXT UNIQUE, '
+                              'added REAL, total INTEGER)')
+            self.conn.execute('CREATE TABLE IF NOT EXISTS vocabulary (id INTEGER PRIMARY KEY, word TEXT UNIQUE)')
+            self.conn.execute('CREATE TABLE IF NOT EXISTS counts (doc_id INTEGER, word_id INTEGER, count INTEGER, '
+                              'PRIMARY KEY (doc_id, word_id)) WITHOUT ROWID')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS counts_word ON counts (word_id, doc_id)')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS documents_added ON documents (added)')
+
+    def add_document(self, path, counts, added=None):
+        # 同一路径再次处理时替换原来的记录
+        path = os.path.abspath(path)
+        added = added or time.time()
+        with self.lock, self.conn:
+            old = self.conn.execute('SELECT id FROM documents WHERE path = ?', (path,)).fetchone()
+            if old:
+                self.conn.execute('DELETE FROM counts WHERE doc_id = ?', old)
+                self.conn.execute('DELETE FROM documents WHERE id = ?', old)
+            doc_id = self.conn.execute('INSERT INTO documents (path, added, total) VALUES (?, ?, ?)',
+                                       (path, added, sum(counts.values()))).lastrowid
+            self.conn.executemany('INSERT OR IGNORE INTO vocabulary (word) VALUES (?)', ((w,) for w in counts))
+            # 用临时表批量取回单词编号，避免逐个查询
+            self.conn.execute('CREATE TEMP TABLE IF NOT EXISTS batch (word TEXT PRIMARY KEY, count INTEGER)')
+            self.conn.execute('DELETE FROM batch')
+            self.conn.executemany('INSERT INTO batch VALUES (?, ?)', counts.items())
+            self.conn.execute('INSERT INTO counts SELECT ?, v.id, b.count FROM batch b JOIN vocabulary v '
+                              'ON v.word = b.word', (doc_id,))
+        return doc_id
+
+    @staticmethod
+    def _period(since, until):
+        return (since.timestamp() if since else 0, until.timestamp() if until else math.inf)
+
+    def top_words(self, n=50, since=None, until=None):
+        with self.lock:
+            return self.conn.execute('SELECT v.word, SUM(c.count) AS total FROM counts c '
+                                     'JOIN documents d ON d.id = c.doc_id JOIN vocabulary v ON v.id = c.word_id '
+                                     'WHERE d.added >= ? AND d.added < ? GROUP BY c.word_id '
+                                     'ORDER BY total DESC, v.word LIMIT ?', (*self._period(since, until), n)).fetchall()
+
+    def document_frequency(self, n=50, since=None, until=None):
+        # 出现在最多文章中的单词：(单词, 文章数)
+        with self.lock:
+            return self.conn.execute('SELECT v.word, COUNT(*) AS df FROM counts c '
+                                     'JOIN documents d ON d.id = c.doc_id JOIN vocabulary v ON v.id = c.word_id '
+                                     'WHERE d.added >= ? AND d.added < ? GROUP BY c.word_id '
+                                     'ORDER BY df DESC, v.word LIMIT ?', (*self._period(since, until), n)).fetchall()
+
+    def tfidf(self, path, n=50):
+        # 单篇文章中TF-IDF最高的单词：tf = 次数 / 文章总词数，idf = ln(文章总数 / 文档频率)
+        with self.lock:
+            doc = self.conn.execute('SELECT id, total FROM documents WHERE path = ?',
+                                    (os.path.abspath(path),)).fetchone()
+            if doc is None:
+                return []
+            documents = self.conn.execute('SELECT COUNT(*) FROM documents').fetchone()[0]
+            rows = self.conn.execute('SELECT v.word, c.count, '
+                                     '(SELECT COUNT(*) FROM counts x WHERE x.word_id = c.word_id) FROM counts c '
+                                     'JOIN vocabulary v ON v.id = c.word_id WHERE c.doc_id = ?', (doc[0],)).fetchall()
+        scores = [(word, count / doc[1] * math.log(documents / df)) for word, count, df in rows]
+        scores.sort(key=lambda x: (-x[1], x[0]))
+        return scores[:n]
+
+    def vocabulary_growth(self):
+        # 按日期统计：(日期, 当天文章数, 当天新出现的单词数, 累计不同单词数)
+        with self.lock:
+            new_words = dict(self.conn.execute(
+                "SELECT date(first, 'unixepoch', 'localtime') AS day, COUNT(*) FROM "
+                '(SELECT MIN(d.added) AS first FROM counts c JOIN documents d ON d.id = c.doc_id GROUP BY c.word_id) '
+                'GROUP BY day').fetchall())
+            documents = self.conn.execute("SELECT date(added, 'unixepoch', 'localtime') AS day, COUNT(*) "
+                                          'FROM documents GROUP BY day ORDER BY day').fetchall()
+        growth, total = [], 0
+        for day, document_count in documents:
+            total += new_words.get(day, 0)
+            growth.append((day, document_count, new_words.get(day, 0), total))
+        return growth
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('command', choices=['top', 'df', 'tfidf', 'growth'])
+    parser.add_argument('path', nargs='?')
+    parser.add_argument('--db', default=CORPUS_FILE)
+    parser.add_argument('--n', type=int, default=50)
+    parser.add_argument('--since', type=datetime.fromisoformat)
+    parser.add_argument('--until', type=datetime.fromisoformat)
+    args = parser.parse_args()
+
+    db = CorpusDB(args.db)
+    if args.command == 'top':
+        rows = db.top_words(args.n, args.since, args.until)
+    elif args.command == 'df':
+        rows = db.document_frequency(args.n, args.since, args.until)
+    elif args.command == 'tfidf':
+        if not args.path:
+            parser.error('tfidf 需要文章路径')
+        rows = [(word, f'{score:.5f}') for word, score in db.tfidf(args.path, args.n)]
+    else:
+        rows = db.vocabulary_growth()
+    for row in rows:
+        print('\t'.join(str(value) for value in row))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+本地模糊匹配：OCR、手打文章中的错拼单词查不到时，在已知词头中找最接近的单词，不再发网络请求重试
+SymSpell的删除字典：预先为每个词头生成删除1~max_distance个字符后的所有变体（只取前prefix_length个字符），
+查询时同样生成错词的删除变体，在字典中命中的候选再用编辑距离（含相邻字符交换）确认
+距离相同的候选按词频排名（有排名表时）优先，其次按字母顺序
+
+用法: python fuzzy_match.py 单词 [单词...] [--cache word_cache.db] [--wordlist wordlist.txt]
+
+"""
+import argparse
+import os
+import threading
+
+MAX_DISTANCE = 2
+PREFIX_LENGTH = 7
+
+
+def edit_distance(a, b, limit):
+    # 限制距离的Damerau-Levenshtein（OSA），超过limit返回limit+1
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = i
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+            row_min = min(row_min, current[j])
+        if row_min > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return min(previous[-1], limit + 1)
+
+
+class SymSpell:
+
+    def __init__(self, max_distance=MAX_DISTANCE, prefix_length=PREFIX_LENGTH, ranks=None):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.ranks = ranks
+        self.words = set()
+        self.deletes = {}  # 删除变体 -> 词头列表
+        self.lock = threading.Lock()
+
+    def _variants(self, word, distance):
+        key = word[:self.prefix_length]
+        variants = {key}
+        edges = {key}
+        for _ in range(distance):
+            edges = {edge[:i] + edge[i + 1:] for edge in edges if len(edge) > 1 for i in range(len(edge))}
+            variants |= edges
+        return variants
+
+    def add(self, word):
+        word = word.lower()
+        with self.lock:
+            if word in self.words:
+                return
+            self.words.add(word)
+            for variant in self._variants(word, self.max_distance):
+                self.deletes.setdefault(variant, []).append(word)
+
+    def update(self, words):
+        for word in words:
+            self.add(word)
+
+    def _order(self, candidate):
+        distance, word = candidate
+        rank = self.ranks.rank(word) if self.ranks is not None else None
+        return distance, rank or float('inf'), word
+
+    def lookup(self, word):
+        # 返回 (词头, 距离)，没有足够接近的词头返回None；短词允许的距离更小，避免"the"被改成"she"这类误纠
+        word = word.lower()
+        if word in self.words:
+            return word, 0
+        limit = min(self.max_distance, len(word) // 4)
+        if limit == 0:
+            return None
+
+        # 查询词只需删除到limit个字符：词头的变体已删除到max_distance，距离不超过limit的词头都能命中
+        with self.lock:
+            candidates = {headword for variant in self._variants(word, limit) for headword in self.deletes.get(variant, ())}
+        matches = []
+        for candidate in candidates:
+            distance = edit_distance(word, candidate, limit)
+            if distance <= limit:
+                matches.append((distance, candidate))
+        if not matches:
+            return None
+        distance, headword = min(matches, key=self._order)
+        return headword, distance
+
+    def correct(self, word):
+        match = self.lookup(word)
+        return match[0] if match and match[1] else None
+
+
+def main():
+    from rank_table import RANK_FILE, load as load_rank_table
+    from word_cache import CACHE_FILE, WordCache, load_wordlist
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('words', nargs='+')
+    parser.add_argument('--cache', default=CACHE_FILE)
+    parser.add_argument('--wordlist', default='wordlist.txt')
+    parser.add_argument('--max-distance', type=int, default=MAX_DISTANCE)
+    args = parser.parse_args()
+
+    index = SymSpell(args.max_distance, ranks=load_rank_table(RANK_FILE))
+    index.update(WordCache(args.cache).headwords())
+    if os.path.exists(args.wordlist):
+        index.update(load_wordlist(args.wordlist))
+    for word in args.words:
+        match = index.lookup(word)
+        print(f'{word}\t{match[0]}\t{match[1]}' if match else f'{word}\t-')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+对冲请求：一次请求超过最近的p95耗时还没返回，就再发一个相同的请求，取先返回的结果
+每次调用有硬性截止时间，超时抛出TimeoutError，慢请求不会无限拖住调用方
+
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+DEADLINE = 15.0  # 单次调用（含对冲请求）的截止时间（秒）
+DEFAULT_DELAY = 1.0  # 样本不足时的对冲等待时间
+MIN_DELAY = 0.2
+MIN_SAMPLES = 20
+
+
+class Hedged:
+
+    def __init__(self, fn, deadline=DEADLINE, percentile=0.95, window=500, max_workers=32):
+        self.fn = fn
+        self.deadline = deadline
+        self.percentile = percentile
+        self.latencies = deque(maxlen=window)
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers)
+        self.hedges = 0
+
+    def delay(self):
+        with self.lock:
+            samples = sorted(self.latencies)
+        if len(samples) < MIN_SAMPLES:
+            return DEFAULT_DELAY
+        return max(MIN_DELAY, samples[int(len(samples) * self.percentile) - 1])
+
+    def _timed(self, args):
+        start = time.monotonic()
+        result = self.fn(*args)
+        with self.lock:
+            self.latencies.append(time.monotonic() - start)
+        return result
+
+    def __call__(self, *args):
+        deadline = time.monotonic() + self.deadline
+        futures = {self.executor.submit(self._timed, args)}
+        done, _ = wait(futures, timeout=min(self.delay(), self.deadline))
+        if not done:
+            self.hedges += 1
+            futures.add(self.executor.submit(self._timed, args))
+
+        error = None
+        while futures:
+            done, futures = wait(futures, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                raise TimeoutError(f'请求超过{self.deadline}秒未返回')
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = error or future.exception()
+        raise error
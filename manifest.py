@@ -0,0 +1,107 @@
+"""
+输入文件清单：每个文件夹下一个 .article2words.json，记录每个输入文件的内容哈希、处理时的配置指纹和输出文件
+再次运行时，内容和配置都没变、输出文件还在的输入直接跳过
+文件大小和修改时间都没变时不重新计算哈希
+一次运行中用Manifests缓存各文件夹的清单：每个清单只读取一次，改动先记在内存里，flush时每个改过的清单只写一次
+
+
+"""
+import hashlib
+import json
+import os
+import threading
+
+MANIFEST_NAME = '.article2words.json'
+
+
+def file_hash(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1024 * 1024), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def make_entry(file_path, output_file, fingerprint):
+    stat = os.stat(file_path)
+    return {
+        'sha256': file_hash(file_path),
+        'size': stat.st_size,
+        'mtime': stat.st_mtime,
+        'config': fingerprint,
+        'output': os.path.abspath(output_file),
+    }
+
+
+class Manifest:
+
+    def __init__(self, directory):
+        self.path = os.path.join(directory, MANIFEST_NAME)
+        self.entries = {}
+        self.changed = False  # 有没保存的改动
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as file:
+                self.entries = json.load(file)
+
+    def is_current(self, file_path, fingerprint):
+        entry = self.entries.get(os.path.basename(file_path))
+        if not entry or entry['config'] != fingerprint or not os.path.exists(entry['output']):
+            return False
+        stat = os.stat(file_path)
+        if entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime:
+            return True
+        if entry['size'] != stat.st_size or entry['sha256'] != file_hash(file_path):
+            return False
+        # 只是修改时间变了，内容没变
+        entry['mtime'] = stat.st_mtime
+        self.changed = True
+        return True
+
+    def output(self, file_path):
+        return self.entries[os.path.basename(file_path)]['output']
+
+    def record(self, file_path, entry):
+        self.entries[os.path.basename(file_path)] = entry
+        self.changed = True
+
+    def save(self):
+        # 先写临时文件再替换，中途退出不会留下损坏的清单
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump(self.entries, file, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(temp_path, self.path)
+        self.changed = False
+
+
+class Manifests:
+    # 跳过检查和记录清单在不同线程中进行，共用同一份缓存，读写都加锁
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.manifests = {}  # 文件夹 -> Manifest
+
+    def _get(self, file_path):
+        directory = os.path.dirname(os.path.abspath(file_path))
+        if directory not in self.manifests:
+            self.manifests[directory] = Manifest(directory)
+        return self.manifests[directory]
+
+    def is_current(self, file_path, fingerprint):
+        with self.lock:
+            return self._get(file_path).is_current(file_path, fingerprint)
+
+    def output(self, file_path):
+        with self.lock:
+            return self._get(file_path).output(file_path)
+
+    def record(self, file_path, output_file, fingerprint):
+        # 计算哈希不占用锁
+        entry = make_entry(file_path, output_file, fingerprint)
+        with self.lock:
+            self._get(file_path).record(file_path, entry)
+
+    def flush(self):
+        with self.lock:
+            for manifest in self.manifests.values():
+                if manifest.changed:
+                    manifest.save()
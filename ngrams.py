@@ -0,0 +1,133 @@
+"""
+短语（n-gram）统计，内存固定
+1、按句子流式读取单词，生成2~3个词的短语，短语不跨句
+2、计数用count-min sketch：宽度 w = ceil(e / epsilon)，深度 d = ceil(ln(1 / delta))，
+   占用 w * d * 4 字节；估计值只会偏大，以 1 - delta 的概率误差不超过 epsilon * 短语总数
+3、高频短语用大小为top_k的堆维护，内存与语料大小无关
+4、以停用词（或已掌握的单词）开头或结尾的短语（of the、in a ...）不计数，高频短语不会被虚词组合占满
+
+"""
+import heapq
+import math
+import re
+from array import array
+
+TOKEN = re.compile(r"[a-zA-Z']+|[.!?;:\n]")
+SENTENCE_END = frozenset('.!?;:\n')
+STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being below between both but by
+can could did do does doing down during each few for from further had has have having he her here hers herself him
+himself his how i if in into is it it's its itself just me more most my myself no nor not now of off on once only or
+other our ours ourselves out over own same she should so some such than that that's the their theirs them themselves
+then there these they this those through to too under until up very was we were what when where which while who whom
+why will with would you your yours yourself yourselves don't doesn't didn't isn't aren't wasn't weren't can't won't
+i'm you're he's she's we're they're i've you've we've they've i'll you'll he'll she'll we'll they'll i'd you'd he'd
+she'd we'd they'd let's there's
+""".split())
+
+
+class CountMinSketch:
+
+    def __init__(self, epsilon=0.0001, delta=0.01):
+        self.width = math.ceil(math.e / epsilon)
+        self.depth = math.ceil(math.log(1 / delta))
+        self.rows = [array('I', bytes(4 * self.width)) for _ in range(self.depth)]
+        self.total = 0
+
+    def _columns(self, item):
+        return [hash((seed, item)) % self.width for seed in range(self.depth)]
+
+    def add(self, item, count=1):
+        # 返回加入后的估计值
+        self.total += count
+        estimate = None
+        for row, column in zip(self.rows, self._columns(item)):
+            row[column] += count
+            if estimate is None or row[column] < estimate:
+                estimate = row[column]
+        return estimate
+
+    def __getitem__(self, item):
+        return min(row[column] for row, column in zip(self.rows, self._columns(item)))
+
+    @property
+    def memory(self):
+        return sum(row.itemsize * len(row) for row in self.rows)
+
+
+class TopK:
+
+    def __init__(self, k):
+        self.k = k
+        self.counts = {}
+        self.heap = []
+
+    def _min(self):
+        # 堆里可能有过期的计数，弹出直到堆顶与当前计数一致
+        while True:
+            count, item = self.heap[0]
+            if self.counts.get(item) == count:
+                return count, item
+            heapq.heappop(self.heap)
+
+    def offer(self, item, count):
+        if item not in self.counts and len(self.counts) >= self.k:
+            min_count, min_item = self._min()
+            if count <= min_count:
+                return
+            del self.counts[min_item]
+            heapq.heappop(self.heap)
+        self.counts[item] = count
+        heapq.heappush(self.heap, (count, item))
+        if len(self.heap) > 4 * self.k:
+            self.heap = [(c, i) for i, c in self.counts.items()]
+            heapq.heapify(self.heap)
+
+    def most_common(self, n=None):
+        items = sorted(self.counts.items(), key=lambda x: (-x[1], x[0]))
+        return items[:n] if n else items
+
+
+class PhraseCounter:
+
+    def __init__(self, sizes=(2, 3), top_k=200, epsilon=0.0001, delta=0.01, excluded=STOPWORDS):
+        self.sizes = sizes
+        self.excluded = excluded  # 短语的首尾单词不能是这些词
+        self.sketches = {n: CountMinSketch(epsilon, delta) for n in sizes}
+        self.top = {n: TopK(top_k) for n in sizes}
+
+    def update(self, tokens):
+        window = []
+        longest = max(self.sizes)
+        for token in tokens:
+            if token in SENTENCE_END:
+                window.clear()
+                continue
+            window.append(token.lower())
+            if len(window) > longest:
+                del window[0]
+            for n in self.sizes:
+                if len(window) >= n and window[-n] not in self.excluded and window[-1] not in self.excluded:
+                    phrase = ' '.join(window[-n:])
+                    self.top[n].offer(phrase, self.sketches[n].add(phrase))
+
+    def most_common(self, n=None, min_count=2):
+        phrases = [item for top in self.top.values() for item in top.most_common() if item[1] >= min_count]
+        phrases.sort(key=lambda x: (-x[1], x[0]))
+        return phrases[:n] if n else phrases
+
+    @property
+    def memory(self):
+        return sum(sketch.memory for sketch in self.sketches.values())
+
+
+def iter_tokens(text):
+    for match in TOKEN.finditer(text):
+        yield match.group()
+
+
+def iter_file_tokens(file_path):
+    # 按行流式读取，大文件不需要一次读入内存
+    with open(file_path, 'r', encoding='utf-8', errors='ignore') as file:
+        for line in file:
+            yield from iter_tokens(line)
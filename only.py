@@ -8,25 +8,42 @@ from lxml import etree
 from openpyxl import load_workbook
 from openpyxl.styles import Font, NamedStyle
 from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from word_cache import WordCache
 
 
-def get_word_info(word):
+WORDLIST_FILE = 'wordlist.txt'
+
+cache = WordCache()
+if os.path.exists(WORDLIST_FILE):
+    cache.build_bloom(WORDLIST_FILE)
+
+
+def fetch_word_info(word):
     # 构造请求URL
     url = f'https://www.youdao.com/w/eng/{word}'
 
-    try:
-        paraphrase = ""
-        data = requests.get(url).text
-        html = etree.HTML(data)
+    paraphrase = ""
+    response = requests.get(url)
+    response.raise_for_status()
+    html = etree.HTML(response.text)
 
-        british_pronunciation = html.xpath('//*[@id="phrsListTab"]/h2/div/span[1]/span/text()')[0]
-        american_pronunciation = html.xpath('//*[@id="phrsListTab"]/h2/div/span[2]/span/text()')[0]
+    british_pronunciation = html.xpath('//*[@id="phrsListTab"]/h2/div/span[1]/span/text()')
+    american_pronunciation = html.xpath('//*[@id="phrsListTab"]/h2/div/span[2]/span/text()')
+    if not british_pronunciation or not american_pronunciation:
+        # 有道查不到该单词
+        return None
+
+    li_elements = html.xpath('//*[@id="phrsListTab"]/div/ul')
+    for li in li_elements:
+        paraphrase += ''.join(li.xpath('.//text()'))
+
+    return british_pronunciation[0], american_pronunciation[0], paraphrase
 
-        li_elements = html.xpath('//*[@id="phrsListTab"]/div/ul')
-        for li in li_elements:
-            paraphrase += ''.join(li.xpath('.//text()'))
 
-        return british_pronunciation, american_pronunciation, paraphrase
+def get_word_info(word):
+    try:
+        # 先查缓存，查不到的单词记入负向缓存，下次不再请求
+        return cache.lookup(word, fetch_word_info)
     except Exception:
         return None
 
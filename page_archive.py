@@ -0,0 +1,127 @@
+"""
+有道原始页面归档
+1、查询到的原始HTML压缩后（有zstandard用zstd，否则zlib）追加写入 pages.pack
+2、index.db 记录页面内容哈希 -> 在pack中的偏移和长度，以及单词 -> 页面哈希；内容相同的页面只存一份
+3、有道改版后，用 reextract 命令对归档页面重新解析并更新缓存，不发任何网络请求
+
+用法: python page_archive.py reextract [--archive page_archive] [--cache word_cache.db] [--failed-only]
+
+"""
+import argparse
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ARCHIVE_DIR = 'page_archive'
+REEXTRACT_BATCH = 1024
+
+
+def compress(data):
+    if zstandard is not None:
+        return 'zstd', zstandard.ZstdCompressor(level=10).compress(data)
+    return 'zlib', zlib.compress(data, 9)
+
+
+def decompress(codec, data):
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError('归档使用zstd压缩，请先安装zstandard')
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+class PageArchive:
+
+    def __init__(self, path=ARCHIVE_DIR):
+        os.makedirs(path, exist_ok=True)
+        self.pack_path = os.path.join(path, 'pages.pack')
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(path, 'index.db'), check_same_thread=False)
+        with self.conn:
+            self.conn.execute('CREATE TABLE IF NOT EXISTS blobs (digest TEXT PRIMARY KEY, offset INTEGER, '
+                              'length INTEGER, codec TEXT)')
+            self.conn.execute('CREATE TABLE IF NOT EXISTS pages (word TEXT PRIMARY KEY, digest TEXT, fetched REAL)')
+
+    def put(self, word, text):
+        data = text.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        with self.lock, self.conn:
+            exists = self.conn.execute('SELECT 1 FROM blobs WHERE digest = ?', (digest,)).fetchone()
+            if not exists:
+                codec, packed = compress(data)
+                with open(self.pack_path, 'ab') as pack:
+                    offset = pack.tell()
+                    pack.write(packed)
+                self.conn.execute('INSERT INTO blobs VALUES (?, ?, ?, ?)', (digest, offset, len(packed), codec))
+            self.conn.execute('INSERT OR REPLACE INTO pages VALUES (?, ?, ?)', (word, digest, time.time()))
+
+    def get(self, word):
+        with self.lock:
+            row = self.conn.execute('SELECT b.offset, b.length, b.codec FROM pages p JOIN blobs b '
+                                    'ON p.digest = b.digest WHERE p.word = ?', (word,)).fetchone()
+        if row is None:
+            return None
+        offset, length, codec = row
+        with open(self.pack_path, 'rb') as pack:
+            pack.seek(offset)
+            return decompress(codec, pack.read(length)).decode('utf-8')
+
+    def __iter__(self):
+        # 按pack中的偏移顺序读取，顺序IO
+        with self.lock:
+            rows = self.conn.execute('SELECT p.word, b.offset, b.length, b.codec FROM pages p JOIN blobs b '
+                                     'ON p.digest = b.digest ORDER BY b.offset').fetchall()
+        with open(self.pack_path, 'rb') as pack:
+            for word, offset, length, codec in rows:
+                pack.seek(offset)
+                yield word, decompress(codec, pack.read(length)).decode('utf-8')
+
+
+def reextract(archive, cache, failed_only=False, workers=None):
+    from youdao import parse_page
+
+    pages = ((word, text) for word, text in archive if not (failed_only and cache.get(word)))
+
+    found = missed = 0
+    # 解析是CPU密集的，多进程并行；写缓存留在主进程
+    # 每次只解压、提交REEXTRACT_BATCH个页面，归档再大内存占用也有上限
+    with ProcessPoolExecutor(workers) as executor:
+        while batch := list(islice(pages, REEXTRACT_BATCH)):
+            results = executor.map(parse_page, [text for _, text in batch], chunksize=64)
+            for (word, _), word_info in zip(batch, results):
+                if not word_info:
+                    cache.put_miss(word)
+                    missed += 1
+                    continue
+                cache.put(word, word_info)
+                found += 1
+    return found, missed
+
+
+def main():
+    from word_cache import CACHE_FILE, WordCache
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('command', choices=['reextract'])
+    parser.add_argument('--archive', default=ARCHIVE_DIR)
+    parser.add_argument('--cache', default=CACHE_FILE)
+    parser.add_argument('--failed-only', action='store_true', help='只重新解析缓存中没有结果的单词')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    found, missed = reextract(PageArchive(args.archive), WordCache(args.cache), args.failed_only)
+    print(f'重新解析完成: 成功{found}个, 失败{missed}个, 用时{time.perf_counter() - start:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
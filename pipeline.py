@@ -0,0 +1,496 @@
+"""
+流水线引擎
+数据源 -> 读取 -> 分词 -> 计数 -> 过滤 -> 查询 -> 输出，每个阶段处理一个Document，阶段之间用生成器或有界队列连接
+阶段的运行方式（Stage.mode）：
+  inline  在下游的线程中以生成器方式运行
+  thread  在独立线程中运行
+  process 在进程池中运行，阶段对象和Document需要能pickle
+  async   在独立线程的asyncio事件循环中运行，最多同时处理queue_size个Document
+thread/process/async 模式下阶段之间的队列有上限，下游处理不过来时上游会阻塞（背压）
+
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from queue import Queue
+
+import docx
+from openpyxl import Workbook
+from openpyxl.styles import Font
+
+from ngrams import STOPWORDS, PhraseCounter, iter_file_tokens, iter_tokens
+from scheduler import PENDING, schedule_lookups
+from sharded_count import SHARD_THRESHOLD, count_file
+from words import PositionalIndex, clean_words, get_word_counts, parse_text
+from words_vectorized import clean_and_count_vectorized
+
+QUEUE_SIZE = 8
+MANIFEST_FLUSH_EVERY = 64  # 每记录这么多个文件保存一次清单，中途退出最多重新处理这么多个文件
+_DONE = object()
+
+
+class _Error:
+
+    def __init__(self, error):
+        self.error = error
+
+
+def is_huge(doc):
+    # 超大txt不读入内存，按文件处理
+    return not doc.text and doc.path.endswith('.txt') and os.path.getsize(doc.path) >= SHARD_THRESHOLD
+
+
+class Document:
+
+    def __init__(self, path):
+        self.path = path
+        self.output = path + '.xlsx'
+        self.skipped = False  # 清单中记录为未变化，后续阶段直接放行
+        self.text = ''
+        self.tokens = None
+        self.counts = None
+        self.words = None
+        self.results = {}
+        self.phrases = []
+        self.audio = {}
+        self.index = None
+        self.corrections = None  # 错拼单词 -> 纠正后的词头；None表示未开启纠错
+        self.pending = 0  # 预算用完或查询出错、还没查到的单词数，加上发音下载失败的单词数
+
+
+class Stage:
+
+    def __init__(self, mode='inline', workers=None):
+        self.mode = mode
+        self.workers = workers
+
+    def process(self, doc):
+        # 返回处理后的Document，返回None则丢弃
+        return doc
+
+    async def process_async(self, doc):
+        return await asyncio.to_thread(self.process, doc)
+
+    def handle(self, doc):
+        return doc if doc.skipped else self.process(doc)
+
+    async def handle_async(self, doc):
+        return doc if doc.skipped else await self.process_async(doc)
+
+    def run(self, docs):
+        for doc in docs:
+            doc = self.handle(doc)
+            if doc is not None:
+                yield doc
+
+
+def _drain(produce, queue_size):
+    # 在后台线程中执行produce(emit)，通过有界队列把结果交给调用方
+    queue = Queue(queue_size)
+
+    def worker():
+        try:
+            produce(queue.put)
+        except BaseException as e:
+            queue.put(_Error(e))
+        queue.put(_DONE)
+
+    threading.Thread(target=worker, daemon=True).start()
+    while True:
+        item = queue.get()
+        if item is _DONE:
+            return
+        if isinstance(item, _Error):
+            raise item.error
+        yield item
+
+
+def _run_in_thread(stage, docs, queue_size):
+    def produce(emit):
+        for doc in stage.run(docs):
+            emit(doc)
+
+    return _drain(produce, queue_size)
+
+
+def _run_in_loop(stage, docs, queue_size):
+    async def drive(emit):
+        loop = asyncio.get_running_loop()
+        iterator = iter(docs)
+        window = deque()
+
+        async def flush():
+            doc = await window.popleft()
+            if doc is not None:
+                await loop.run_in_executor(None, emit, doc)
+
+        while True:
+            doc = await loop.run_in_executor(None, next, iterator, _DONE)
+            if doc is _DONE:
+                break
+            window.append(asyncio.ensure_future(stage.handle_async(doc)))
+            if len(window) >= queue_size:
+                await flush()
+        while window:
+            await flush()
+
+    return _drain(lambda emit: asyncio.run(drive(emit)), queue_size)
+
+
+def _run_in_processes(stage, docs, queue_size, executor):
+    window = deque()
+    for doc in docs:
+        window.append(executor.submit(stage.handle, doc))
+        if len(window) >= queue_size:
+            doc = window.popleft().result()
+            if doc is not None:
+                yield doc
+    while window:
+        doc = window.popleft().result()
+        if doc is not None:
+            yield doc
+
+
+class Pipeline:
+
+    def __init__(self, source, stages, queue_size=QUEUE_SIZE):
+        self.source = source
+        self.stages = stages
+        self.queue_size = queue_size
+
+    def run(self):
+        # 生成器，每个Document经过全部阶段后产出一次，可用于更新进度
+        with ExitStack() as stack:
+            docs = iter(self.source)
+            for stage in self.stages:
+                if stage.mode == 'thread':
+                    docs = _run_in_thread(stage, docs, self.queue_size)
+                elif stage.mode == 'process':
+                    # 上游阶段的线程已经或即将启动，进程池创建子进程时用spawn，fork多线程的进程可能死锁
+                    executor = stack.enter_context(
+                        ProcessPoolExecutor(stage.workers, mp_context=multiprocessing.get_context('spawn')))
+                    # 同时提交的Document不少于进程数，否则进程池用不满
+                    window = max(self.queue_size, stage.workers or os.cpu_count() or 1)
+                    docs = _run_in_processes(stage, docs, window, executor)
+                elif stage.mode == 'async':
+                    docs = _run_in_loop(stage, docs, self.queue_size)
+                else:
+                    docs = stage.run(docs)
+            yield from docs
+
+
+class FileSource:
+
+    def __init__(self, paths):
+        self.paths = paths
+
+    def __iter__(self):
+        for path in self.paths:
+            yield Document(path)
+
+
+class SkipUnchanged(Stage):
+
+    def __init__(self, fingerprint, manifests, force=False, **kwargs):
+        super().__init__(**kwargs)
+        self.fingerprint = fingerprint
+        self.manifests = manifests
+        self.force = force
+
+    def process(self, doc):
+        if not self.force and self.manifests.is_current(doc.path, self.fingerprint):
+            logging.info(f'文件未变化，跳过:{doc.path}')
+            doc.output = self.manifests.output(doc.path)
+            doc.skipped = True
+        return doc
+
+
+class ReadStage(Stage):
+
+    def process(self, doc):
+        logging.info(f'处理文件:{doc.path}')
+        if doc.path.endswith('.txt') and os.path.getsize(doc.path) < SHARD_THRESHOLD:
+            with open(doc.path) as f:
+                doc.text = f.read()
+        elif doc.path.endswith('.docx'):
+            document = docx.Document(doc.path)
+            doc.text = ' '.join(p.text for p in document.paragraphs)
+        return doc
+
+
+class TokenizeStage(Stage):
+
+    def process(self, doc):
+        if is_huge(doc):
+            # 超大文件mmap后分段多进程统计，直接得到词频
+            doc.counts = count_file(doc.path)
+        else:
+            doc.tokens = parse_text(doc.text)
+        return doc
+
+
+class IndexStage(Stage):
+    # 代替 TokenizeStage + CountStage：一次遍历建立位置索引用于提取例句，词频直接从索引得到，FilterStage按词频中的单词清洗
+
+    def process(self, doc):
+        if is_huge(doc):
+            # 超大文件不建索引，没有例句
+            doc.counts = count_file(doc.path)
+        else:
+            doc.index = PositionalIndex(doc.text)
+            doc.counts = doc.index.counts()
+        return doc
+
+
+class CountStage(Stage):
+
+    def process(self, doc):
+        # 词频按原文全部单词统计
+        if doc.counts is None:
+            doc.counts = get_word_counts(doc.tokens)
+        return doc
+
+
+class FilterStage(Stage):
+
+    def __init__(self, excluded=frozenset(), **kwargs):
+        super().__init__(**kwargs)
+        self.excluded = excluded
+
+    def process(self, doc):
+        doc.words = clean_words(doc.tokens if doc.tokens is not None else doc.counts, self.excluded)
+        # 分词结果到这里就用完了，不再随Document传给后面的阶段（process模式下会被pickle到子进程）
+        doc.tokens = None
+        return doc
+
+
+class VectorizedStage(Stage):
+    # 代替 TokenizeStage + CountStage + FilterStage，用NumPy向量化分词、清洗和统计
+
+    def __init__(self, excluded=frozenset(), **kwargs):
+        super().__init__(**kwargs)
+        self.excluded = excluded
+
+    def process(self, doc):
+        if is_huge(doc):
+            doc.counts = count_file(doc.path)
+            doc.words = clean_words(doc.counts, self.excluded)
+        else:
+            doc.words, doc.counts = clean_and_count_vectorized(doc.text, self.excluded)
+        return doc
+
+
+class PhraseStage(Stage):
+
+    def __init__(self, top_k, epsilon=0.0001, delta=0.01, excluded=STOPWORDS, **kwargs):
+        super().__init__(**kwargs)
+        self.top_k = top_k
+        self.epsilon = epsilon
+        self.delta = delta
+        self.excluded = excluded
+
+    def process(self, doc):
+        phrase_counter = PhraseCounter(top_k=self.top_k, epsilon=self.epsilon, delta=self.delta, excluded=self.excluded)
+        if is_huge(doc):
+            # 超大文件没有读入text，按行流式统计
+            phrase_counter.update(iter_file_tokens(doc.path))
+        else:
+            phrase_counter.update(iter_tokens(doc.text))
+        doc.phrases = phrase_counter.most_common(self.top_k)
+        return doc
+
+
+class EnrichStage(Stage):
+
+    def __init__(self, lookup, budget=None, skip=frozenset(), corrector=None, **kwargs):
+        super().__init__(**kwargs)
+        self.lookup = lookup
+        self.budget = budget
+        self.skip = skip
+        self.corrector = corrector
+
+    def process(self, doc):
+        # 按词频从高到低查询，预算用完时高频词已经查好，其余标记为待查询，下次运行时从缓存续查
+        queries = [word for word in doc.words if word not in self.skip]
+        doc.results = schedule_lookups(queries, self.lookup, doc.counts.__getitem__, self.budget)
+        if self.corrector is not None:
+            self.correct(doc)
+        return doc
+
+    def correct(self, doc):
+        # 查不到的单词在本地词头中找最接近的，纠正后的单词作为第二批查询，同样按词频排序、占用本次预算
+        doc.corrections = {}
+        misses = [word for word, word_info in doc.results.items() if not word_info]
+        if not misses:
+            return
+        corrector = self.corrector()
+        corrector.update(word for word, word_info in doc.results.items() if word_info)
+        sources = {}  # 纠正后的单词 -> 被纠正的单词
+        for word in misses:
+            headword = corrector.correct(word)
+            if headword is not None and headword not in self.skip:
+                sources.setdefault(headword, []).append(word)
+
+        results = schedule_lookups(list(sources), self.lookup, lambda h: sum(doc.counts[w] for w in sources[h]),
+                                   self.budget)
+        for headword, words in sources.items():
+            for word in words:
+                if headword not in results:
+                    # 纠正后的单词还没查到，下次运行再纠正
+                    del doc.results[word]
+                elif results[headword]:
+                    doc.results[word] = results[headword]
+                    doc.corrections[word] = headword
+
+
+class AudioStage(Stage):
+
+    def __init__(self, store, **kwargs):
+        super().__init__(**kwargs)
+        self.store = store
+
+    def process(self, doc):
+        # 只下载查到了释义的单词的发音
+        doc.audio, failed = self.store.download_all(word for word, word_info in doc.results.items() if word_info)
+        # 下载失败的发音也算待处理，文件不记入清单，下次运行重新下载
+        doc.pending += len(failed)
+        return doc
+
+
+class ManifestSink(Stage):
+    # 在主进程中记录清单，同一文件夹的清单不会被多个进程同时改写
+    # 与SkipUnchanged共用Manifests，分批保存，结束时（包括中途停止）再保存一次
+
+    def __init__(self, fingerprint, manifests, **kwargs):
+        super().__init__(**kwargs)
+        self.fingerprint = fingerprint
+        self.manifests = manifests
+
+    def process(self, doc):
+        # 还有待查询的单词时不记入清单，下次运行继续处理
+        if not doc.pending:
+            self.manifests.record(doc.path, doc.output, self.fingerprint)
+        return doc
+
+    def run(self, docs):
+        try:
+            for count, doc in enumerate(super().run(docs), 1):
+                if count % MANIFEST_FLUSH_EVERY == 0:
+                    self.manifests.flush()
+                yield doc
+        finally:
+            self.manifests.flush()
+
+
+class CorpusSink(Stage):
+    # 把清洗后单词的词频写入语料库，用于跨文章统计
+
+    def __init__(self, db, **kwargs):
+        super().__init__(**kwargs)
+        self.db = db
+
+    def process(self, doc):
+        self.db.add_document(doc.path, {word: doc.counts[word] for word in doc.words})
+        return doc
+
+
+class WorkbookSink(Stage):
+    # 生成和保存工作簿是CPU密集的，各文件互不依赖，可以用process模式在多个进程中进行；查询已在主进程完成
+
+    def __init__(self, skip=frozenset(), shortest_example=False, ranks=None, **kwargs):
+        super().__init__(**kwargs)
+        self.skip = skip
+        self.shortest_example = shortest_example
+        self.ranks = ranks
+
+    def process(self, doc):
+        # 每次都生成新的工作簿，不保留上次输出中多出来的行、旧的查询结果和已关闭选项的列
+        book = Workbook()
+        sheet = book.active
+
+        sheet['A1'] = 'Word'
+        sheet['B1'] = 'British'
+        sheet['C1'] = 'American'
+        sheet['D1'] = 'Paraphrase'
+        sheet['E1'] = 'Count'
+        headers = []
+        if doc.audio:
+            headers += ['UK Audio', 'US Audio']
+        if doc.index is not None:
+            headers.append('Example')
+            example_column = 5 + len(headers)
+        if self.ranks is not None:
+            # 排名单独一列写成数字，可以直接按排名排序
+            headers += ['Rank', 'Level']
+            rank_column = 4 + len(headers)
+        if doc.corrections is not None:
+            headers.append('Correction')
+            correction_column = 5 + len(headers)
+        for column, header in enumerate(headers, start=6):
+            sheet.cell(1, column, header)
+
+        bold = Font(bold=True)
+        for cell in sheet[1]:
+            cell.font = bold
+
+        pending = 0
+        for row, word in enumerate(doc.words, start=2):
+            sheet.cell(row, 1, word)
+            sheet.cell(row, 5, doc.counts[word])
+            if doc.index is not None:
+                sheet.cell(row, example_column, doc.index.example(word, self.shortest_example))
+            if self.ranks is not None:
+                rank = self.ranks.level(word)
+                if rank:
+                    sheet.cell(row, rank_column, rank[0])
+                    sheet.cell(row, rank_column + 1, rank[1])
+            if word in self.skip:
+                continue
+            if word not in doc.results:
+                sheet.cell(row, 4, PENDING)
+                pending += 1
+                continue
+            word_info = doc.results[word]
+            if word_info:
+                sheet.cell(row, 2, word_info[0])
+                sheet.cell(row, 3, word_info[1])
+                sheet.cell(row, 4, word_info[2])
+            if doc.corrections and word in doc.corrections:
+                sheet.cell(row, correction_column, doc.corrections[word])
+            for column, audio_file in enumerate(doc.audio.get(word, ()), start=6):
+                if audio_file:
+                    self.write_link(sheet.cell(row, column), audio_file, doc.output)
+
+        if doc.phrases:
+            self.write_phrases(book, doc.phrases)
+
+        book.save(doc.output)
+        doc.pending += pending
+        # 后续阶段只用到词频和单词，不再传回原文和索引
+        doc.text, doc.index = '', None
+        return doc
+
+    @staticmethod
+    def write_link(cell, file_path, output_file):
+        # 用相对路径，工作簿和audio文件夹一起移动时链接仍然有效
+        link = os.path.relpath(os.path.abspath(file_path), os.path.dirname(os.path.abspath(output_file)))
+        cell.value = os.path.basename(file_path)
+        cell.hyperlink = link.replace(os.sep, '/')
+        cell.style = 'Hyperlink'
+
+    @staticmethod
+    def write_phrases(book, phrases):
+        sheet = book.create_sheet('Phrases')
+        sheet['A1'] = 'Phrase'
+        sheet['B1'] = 'Count'
+        bold = Font(bold=True)
+        sheet['A1'].font = bold
+        sheet['B1'].font = bold
+        for row, (phrase, count) in enumerate(phrases, start=2):
+            sheet.cell(row, 1, phrase)
+            sheet.cell(row, 2, count)
@@ -0,0 +1,123 @@
+"""
+词频排名表：预先把词频表编译成紧凑的二进制文件（ranks.bin），运行时mmap后二分查找，启动时不解析任何内容
+文件格式：
+  头部   b'A2WR' + 版本号(u32) + 单词数n(u32)
+  偏移   (n + 1) 个u32，第i个单词在字符串区的起止位置
+  排名   n 个u32，与排序后的单词一一对应
+  字符串 按字节序排序后拼接的单词（UTF-8）
+难度等级按排名划分（LEVELS），近似对应CEFR
+
+用法: python rank_table.py build 词频表.txt [ranks.bin]
+词频表每行一个单词（可以带词频，"word 123"），按从高频到低频排列
+
+"""
+import argparse
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+RANK_FILE = 'ranks.bin'
+MAGIC = b'A2WR'
+VERSION = 1
+HEADER = struct.Struct('<4sII')
+# (排名上限, 等级)
+LEVELS = [(1000, 'A1'), (2000, 'A2'), (4000, 'B1'), (8000, 'B2'), (16000, 'C1')]
+
+
+def level_of(rank):
+    for limit, level in LEVELS:
+        if rank <= limit:
+            return level
+    return 'C2'
+
+
+def _little_endian(values):
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+def build(wordlist_path, output_path=RANK_FILE):
+    ranks = {}
+    with open(wordlist_path, 'r', encoding='utf-8') as file:
+        for line in file:
+            if line.strip():
+                ranks.setdefault(line.split()[0].lower(), len(ranks) + 1)
+
+    words = sorted(word.encode('utf-8') for word in ranks)
+    offsets = array('I', [0])
+    for word in words:
+        offsets.append(offsets[-1] + len(word))
+    rank_values = array('I', (ranks[word.decode('utf-8')] for word in words))
+
+    with open(output_path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, len(words)))
+        file.write(_little_endian(offsets).tobytes())
+        file.write(_little_endian(rank_values).tobytes())
+        file.write(b''.join(words))
+    return len(words)
+
+
+class RankTable:
+
+    def __init__(self, path=RANK_FILE):
+        self.path = path
+        with open(path, 'rb') as file:
+            self.mm = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.count = HEADER.unpack_from(self.mm)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'{path} 不是可用的排名表文件')
+        view = memoryview(self.mm)
+        start = HEADER.size
+        self.offsets = view[start:start + 4 * (self.count + 1)].cast('I')
+        start += 4 * (self.count + 1)
+        self.ranks = view[start:start + 4 * self.count].cast('I')
+        self.strings = start + 4 * self.count
+        if sys.byteorder == 'big':
+            # 大端机器上复制一份并转换字节序
+            self.offsets = _little_endian(array('I', self.offsets))
+            self.ranks = _little_endian(array('I', self.ranks))
+
+    def __reduce__(self):
+        # 传给其他进程时只传路径，在那边重新mmap
+        return RankTable, (self.path,)
+
+    def _word(self, i):
+        return self.mm[self.strings + self.offsets[i]:self.strings + self.offsets[i + 1]]
+
+    def rank(self, word):
+        key = word.lower().encode('utf-8')
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._word(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.count and self._word(low) == key:
+            return self.ranks[low]
+        return None
+
+    def level(self, word):
+        rank = self.rank(word)
+        return (rank, level_of(rank)) if rank else None
+
+
+def load(path=RANK_FILE):
+    # 没有排名表时返回None，不添加Rank、Level列
+    return RankTable(path) if os.path.exists(path) else None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('command', choices=['build'])
+    parser.add_argument('wordlist')
+    parser.add_argument('output', nargs='?', default=RANK_FILE)
+    args = parser.parse_args()
+    print(f'写入{build(args.wordlist, args.output)}个单词到{args.output}')
+
+
+if __name__ == '__main__':
+    main()
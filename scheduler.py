@@ -0,0 +1,89 @@
+"""
+查询调度：按优先级（默认词频）从高到低提交查询，可设置本次运行的时间预算和查询次数预算
+查询次数预算只在真正发出网络请求时扣减（WordCache.lookup在缓存未命中时调用Budget.take），缓存命中不占预算
+预算用完后不再发出新的请求，时间用完后已提交但未完成的查询也不再等待，未查询的单词不出现在结果中（标记为待查询，下次运行再查）
+查询出错（网络错误、超时）的单词同样不出现在结果中，与查不到（结果为None）的单词区分开，下次运行重新查询
+
+"""
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+MAX_WORKERS = 16
+PENDING = '待查询'
+
+
+class BudgetExhausted(Exception):
+    pass
+
+
+class Budget:
+
+    def __init__(self, seconds=None, requests=None):
+        self.deadline = time.monotonic() + seconds if seconds else None
+        self.requests = requests
+        self.lock = threading.Lock()
+
+    def remaining(self):
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def take(self):
+        # 消耗一次查询，预算不足返回False
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            return False
+        with self.lock:
+            if self.requests is not None:
+                if self.requests <= 0:
+                    return False
+                self.requests -= 1
+        return True
+
+
+def schedule_lookups(words, lookup, priority, budget=None, max_workers=MAX_WORKERS):
+    """
+    lookup(word, budget) 需要发网络请求时先调用budget.take()，预算不足抛出BudgetExhausted
+    返回 {单词: 查询结果}，预算内没有查完的单词和查询出错的单词不在其中
+    """
+    order = iter(sorted(words, key=lambda word: (-priority(word), word)))
+    results = {}
+    errors = 0
+    running = {}
+    executor = ThreadPoolExecutor(max_workers)
+
+    def submit_next():
+        # 时间用完后不再提交；次数预算用完后继续提交，缓存中有的单词照样能查到
+        if budget is not None and budget.remaining() == 0:
+            return
+        for word in order:
+            running[executor.submit(lookup, word, budget)] = word
+            return
+
+    # 只保持有限个查询在途，预算用完时不会有大量已提交的任务
+    for _ in range(max_workers * 2):
+        submit_next()
+
+    while running:
+        timeout = budget.remaining() if budget is not None else None
+        done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+        if not done:
+            break
+        for future in done:
+            word = running.pop(future)
+            try:
+                results[word] = future.result()
+            except BudgetExhausted:
+                pass
+            except Exception:
+                logging.exception(f'查询单词"{word}"失败')
+                errors += 1
+            submit_next()
+
+    executor.shutdown(wait=False, cancel_futures=True)
+    if errors:
+        logging.warning(f'{errors}个单词查询出错，待下次查询')
+    if len(results) + errors < len(words):
+        logging.info(f'预算用完，已查询{len(results)}个单词，{len(words) - len(results) - errors}个待下次查询')
+    return results
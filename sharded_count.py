@@ -0,0 +1,85 @@
+"""
+单个超大txt文件的并行分词统计
+1、按字节把文件切成若干段，切分点向后移动到非字母位置，保证单词不会被切断
+2、每个进程自己mmap文件，直接在映射的缓冲区上用正则查找单词，不把全文复制到各个进程；
+   每段再按WINDOW大小的小窗口逐个统计，每个进程的内存占用与分段大小无关
+3、各进程的词频合并后返回，结果与 words.get_word_counts(parse_text(text)) 一致（不含空串）
+
+用法: python sharded_count.py big.txt [--workers 8]
+
+"""
+import argparse
+import mmap
+import multiprocessing
+import os
+import re
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+# 与 words.parse_text 的分隔规则一致：字母和撇号之外的字符（包括所有非ASCII字节）都是分隔符
+TOKEN = re.compile(rb"[a-zA-Z']+")
+TOKEN_BYTES = frozenset(b"abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ'")
+SHARD_THRESHOLD = 64 * 1024 * 1024  # 超过64MB的txt才分段并行
+WINDOW = 8 * 1024 * 1024  # findall一次处理的字节数
+
+
+def _align(mm, pos, end):
+    # 向后移动到非字母位置，单词不会被切断
+    while pos < end and mm[pos] in TOKEN_BYTES:
+        pos += 1
+    return pos
+
+
+def shard_ranges(mm, shards):
+    size = len(mm)
+    bounds = [0]
+    for i in range(1, shards):
+        bounds.append(_align(mm, max(size * i // shards, bounds[-1]), size))
+    bounds.append(size)
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if start < end]
+
+
+def count_range(file_path, start, end):
+    with open(file_path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        raw = Counter()
+        while start < end:
+            stop = _align(mm, min(start + WINDOW, end), end)
+            raw.update(TOKEN.findall(mm, start, stop))
+            start = stop
+    # 先按原样计数，再对不同的词做小写合并，比逐个单词转小写快
+    counts = Counter()
+    for token, count in raw.items():
+        counts[token.lower().decode('ascii')] += count
+    return counts
+
+
+def count_file(file_path, workers=None):
+    workers = workers or os.cpu_count() or 1
+    if os.path.getsize(file_path) == 0:
+        return Counter()
+    with open(file_path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        ranges = shard_ranges(mm, workers * 4)
+
+    counts = Counter()
+    # 在流水线中调用时已有读取、查询线程在运行，用spawn启动子进程，不fork多线程的进程
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+        futures = [executor.submit(count_range, file_path, start, end) for start, end in ranges]
+        for future in futures:
+            counts.update(future.result())
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('file')
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    counts = count_file(args.file, args.workers)
+    print(f'单词总数: {sum(counts.values())}, 不同单词: {len(counts)}, 用时{time.perf_counter() - start:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
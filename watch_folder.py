@@ -0,0 +1,120 @@
+"""
+监视文件夹，新增或修改的txt/docx自动处理，结果写到输入文件旁边
+1、Linux下安装了inotify_simple时用inotify，否则定时扫描文件夹
+2、文件在DEBOUNCE秒内没有新的变化且大小不再变化后才处理，避免处理写了一半的文件
+3、常驻进程，缓存、熟词表等只加载一次
+
+用法: python watch_folder.py 文件夹1 [文件夹2 ...] [--poll] [--initial]
+
+"""
+import argparse
+import logging
+import os
+import time
+
+try:
+    import inotify_simple
+except ImportError:
+    inotify_simple = None
+
+DEBOUNCE = 2.0
+POLL_INTERVAL = 1.0
+EXTENSIONS = ('.txt', '.docx')
+
+
+def is_input_file(path):
+    name = os.path.basename(path)
+    # 跳过Word的临时文件
+    return name.endswith(EXTENSIONS) and not name.startswith(('~$', '.'))
+
+
+def scan(directories):
+    snapshot = {}
+    for directory in directories:
+        for entry in os.scandir(directory):
+            if entry.is_file() and is_input_file(entry.path):
+                stat = entry.stat()
+                snapshot[entry.path] = (stat.st_mtime, stat.st_size)
+    return snapshot
+
+
+def poll_events(directories):
+    # 每次返回一批发生变化的文件路径
+    previous = scan(directories)
+    while True:
+        time.sleep(POLL_INTERVAL)
+        current = scan(directories)
+        yield [path for path, stat in current.items() if previous.get(path) != stat]
+        previous = current
+
+
+def inotify_events(directories):
+    inotify = inotify_simple.INotify()
+    flags = inotify_simple.flags
+    watches = {inotify.add_watch(directory, flags.CLOSE_WRITE | flags.MOVED_TO | flags.CREATE | flags.MODIFY): directory
+               for directory in directories}
+    while True:
+        events = inotify.read(timeout=int(POLL_INTERVAL * 1000))
+        yield [os.path.join(watches[event.wd], event.name) for event in events
+               if event.name and is_input_file(event.name)]
+
+
+def watch(directories, handle, use_inotify=True):
+    if use_inotify and inotify_simple is not None:
+        logging.info('使用inotify监视: ' + ', '.join(directories))
+        events = inotify_events(directories)
+    else:
+        logging.info('定时扫描: ' + ', '.join(directories))
+        events = poll_events(directories)
+
+    # 路径 -> (最后一次变化的时间, 文件大小)
+    pending = {}
+    for changed in events:
+        now = time.monotonic()
+        for path in changed:
+            pending[path] = (now, None)
+
+        for path, (changed_at, size) in list(pending.items()):
+            if now - changed_at < DEBOUNCE:
+                continue
+            if not os.path.exists(path):
+                del pending[path]
+                continue
+            current_size = os.path.getsize(path)
+            if current_size != size:
+                # 大小还在变，再等一个周期
+                pending[path] = (now - DEBOUNCE, current_size)
+                continue
+            del pending[path]
+            try:
+                handle(path)
+            except Exception:
+                logging.exception(f'处理文件"{path}"失败')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('directories', nargs='+')
+    parser.add_argument('--poll', action='store_true', help='不使用inotify，定时扫描')
+    parser.add_argument('--initial', action='store_true', help='启动时先处理文件夹中已有的文件')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    from article2words import process_file
+
+    directories = [os.path.abspath(directory) for directory in args.directories]
+    if args.initial:
+        for path in sorted(scan(directories)):
+            try:
+                process_file(path)
+            except Exception:
+                logging.exception(f'处理文件"{path}"失败')
+
+    try:
+        watch(directories, process_file, use_inotify=not args.poll)
+    except KeyboardInterrupt:
+        logging.info('停止监视')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+"""
+单词查询缓存
+1、查询成功的单词写入正向缓存，下次直接读取，不再请求有道
+2、有道查不到的单词（人名、拼写错误、OCR乱码等）写入负向缓存，有单独的过期时间
+3、可选的布隆过滤器，由离线词表和已缓存的词构建，不在其中的词直接跳过，不发请求
+4、同一单词的并发查询合并为一次请求（singleflight）：
+   同进程内的线程共享同一个查询结果或异常；
+   多个进程之间通过缓存库中的inflight表协调，由抢到租约的进程查询，其余进程等待其写入缓存；
+   查询出错时释放租约，等待中的进程重新抢租约自己查询
+
+"""
+import hashlib
+import math
+import os
+import sqlite3
+import threading
+import time
+
+from scheduler import BudgetExhausted
+
+CACHE_FILE = 'word_cache.db'
+CACHE_TTL = 90 * 24 * 3600  # 正向缓存保留90天
+NEGATIVE_TTL = 7 * 24 * 3600  # 负向缓存保留7天，过期后重新查询
+LEASE_TTL = 60  # 查询租约超时，持有者进程卡死或退出后由其他进程接手
+LEASE_POLL = 0.05  # 等待其他进程查询结果的轮询间隔
+
+
+class BloomFilter:
+
+    def __init__(self, capacity, error_rate=0.01):
+        capacity = max(capacity, 1)
+        self.size = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, word):
+        # 双重哈希，一次blake2b得到两个64位哈希值
+        digest = hashlib.blake2b(word.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, word):
+        for pos in self._positions(word):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, word):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(word))
+
+    @classmethod
+    def from_words(cls, words, error_rate=0.01):
+        words = list(words)
+        bloom = cls(len(words), error_rate)
+        for word in words:
+            bloom.add(word)
+        return bloom
+
+
+def load_wordlist(path):
+    # 离线词表，每行一个单词
+    with open(path, 'r', encoding='utf-8') as file:
+        return {line.strip().lower() for line in file if line.strip()}
+
+
+class _Call:
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class WordCache:
+
+    def __init__(self, path=CACHE_FILE, ttl=CACHE_TTL, negative_ttl=NEGATIVE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.bloom = None
+        self.lock = threading.Lock()
+        self.calls = {}
+        self.calls_lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+    @property
+    def conn(self):
+        # 进程池fork出的子进程不能复用父进程的连接，按进程重新打开
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._pid = os.getpid()
+            with self._conn:
+                self._conn.execute('CREATE TABLE IF NOT EXISTS words (word TEXT PRIMARY KEY, british TEXT, '
+                                   'american TEXT, paraphrase TEXT, updated REAL)')
+                self._conn.execute('CREATE TABLE IF NOT EXISTS misses (word TEXT PRIMARY KEY, updated REAL)')
+                self._conn.execute('CREATE TABLE IF NOT EXISTS inflight (word TEXT PRIMARY KEY, owner INTEGER, '
+                                   'started REAL)')
+        return self._conn
+
+    def get(self, word):
+        with self.lock:
+            row = self.conn.execute('SELECT british, american, paraphrase FROM words WHERE word = ? AND updated > ?',
+                                    (word, time.time() - self.ttl)).fetchone()
+        return tuple(row) if row else None
+
+    def is_miss(self, word):
+        with self.lock:
+            row = self.conn.execute('SELECT 1 FROM misses WHERE word = ? AND updated > ?',
+                                    (word, time.time() - self.negative_ttl)).fetchone()
+        return row is not None
+
+    def put(self, word, word_info):
+        with self.lock, self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO words VALUES (?, ?, ?, ?, ?)', (word, *word_info, time.time()))
+            self.conn.execute('DELETE FROM misses WHERE word = ?', (word,))
+
+    def put_miss(self, word):
+        with self.lock, self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO misses VALUES (?, ?)', (word, time.time()))
+
+    def headwords(self):
+        with self.lock:
+            return [row[0] for row in self.conn.execute('SELECT word FROM words')]
+
+    def dump(self):
+        # 按单词排序导出：(单词, 英音, 美音, 释义, 时间)，查不到的单词英音为None
+        with self.lock:
+            rows = self.conn.execute('SELECT word, british, american, paraphrase, updated FROM words UNION ALL '
+                                     'SELECT word, NULL, NULL, NULL, updated FROM misses ORDER BY word').fetchall()
+        return rows
+
+    def load(self, rows):
+        # 批量导入，本地已有更新的记录时保留本地的
+        hits = [row for row in rows if row[1] is not None]
+        misses = [(row[0], row[4]) for row in rows if row[1] is None]
+        with self.lock, self.conn:
+            self.conn.executemany('INSERT INTO words VALUES (?, ?, ?, ?, ?) ON CONFLICT(word) DO UPDATE SET '
+                                  'british = excluded.british, american = excluded.american, '
+                                  'paraphrase = excluded.paraphrase, updated = excluded.updated '
+                                  'WHERE excluded.updated > words.updated', hits)
+            self.conn.executemany('INSERT INTO misses VALUES (?, ?) ON CONFLICT(word) DO UPDATE SET '
+                                  'updated = excluded.updated WHERE excluded.updated > misses.updated', misses)
+            # 已经查到的单词不再保留在负向缓存中
+            self.conn.execute('DELETE FROM misses WHERE word IN (SELECT word FROM words)')
+        return len(hits), len(misses)
+
+    def build_bloom(self, wordlist_path, error_rate=0.01):
+        # 离线词表 + 已查到的词，构成已知词头集合
+        words = load_wordlist(wordlist_path)
+        words.update(self.headwords())
+        self.bloom = BloomFilter.from_words(words, error_rate)
+
+    def _acquire(self, word):
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.execute('DELETE FROM inflight WHERE word = ? AND started < ?', (word, now - LEASE_TTL))
+            cursor = self.conn.execute('INSERT OR IGNORE INTO inflight (word, owner, started) VALUES (?, ?, ?)',
+                                       (word, os.getpid(), now))
+            return cursor.rowcount > 0
+
+    def _release(self, word):
+        # 成功或出错都删除租约；出错时不留记录，之后的查询（包括本进程的重试）可以立即重新请求
+        with self.lock, self.conn:
+            self.conn.execute('DELETE FROM inflight WHERE word = ? AND owner = ?', (word, os.getpid()))
+
+    def _cached(self, word):
+        # 返回 (是否命中, 查询结果)
+        word_info = self.get(word)
+        if word_info:
+            return True, word_info
+        if self.is_miss(word):
+            return True, None
+        return False, None
+
+    def _fetch_once(self, word, fetch, budget):
+        while not self._acquire(word):
+            time.sleep(LEASE_POLL)
+            hit, word_info = self._cached(word)
+            if hit:
+                return word_info
+
+        try:
+            # 拿到租约前其他进程可能刚好查完
+            hit, word_info = self._cached(word)
+            if not hit:
+                # 只有真正发出请求时才消耗查询次数预算
+                if budget is not None and not budget.take():
+                    raise BudgetExhausted(word)
+                word_info = fetch(word)
+                if word_info:
+                    self.put(word, word_info)
+                else:
+                    self.put_miss(word)
+        finally:
+            self._release(word)
+        return word_info
+
+    def lookup(self, word, fetch, budget=None):
+        """
+        fetch(word) 返回 (英音, 美音, 释义)，查不到返回None，网络错误直接抛出异常（不写入负向缓存）
+        给出budget时，需要请求前先扣减，预算不足抛出BudgetExhausted
+        """
+        word = word.strip().lower()
+        hit, word_info = self._cached(word)
+        if hit:
+            return word_info
+        if self.bloom is not None and word not in self.bloom:
+            return None
+
+        with self.calls_lock:
+            call = self.calls.get(word)
+            leader = call is None
+            if leader:
+                call = self.calls[word] = _Call()
+
+        if not leader:
+            # 同一单词已有线程在查询，等待它的结果
+            call.event.wait()
+            if call.error:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._fetch_once(word, fetch, budget)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self.calls_lock:
+                del self.calls[word]
+            call.event.set()
+        return call.result
@@ -0,0 +1,104 @@
+"""
+分词、清洗、词频统计
+熟词表：用户提供的已掌握单词（每行一个），加载为frozenset，在清洗阶段排除，不再查询和写入
+例句：PositionalIndex在分词的同时记录单词位置和所在句子
+
+"""
+import re
+from array import array
+from collections import Counter
+
+
+def load_known_words(path):
+    with open(path, 'r', encoding='utf-8') as file:
+        return frozenset(line.strip().lower() for line in file if line.strip() and not line.startswith('#'))
+
+
+def parse_text(text):
+    words = re.split(r'[^a-zA-Z\']+', text)
+    return words
+
+
+def clean_words(words, known_words=frozenset()):
+    cleaned = {word.lower() for word in words if 2 < len(word) < 16 and not re.search(r'[^a-zA-Z\']', word)}
+    # 排除熟词
+    cleaned.difference_update(known_words)
+    return sorted(cleaned)
+
+
+def get_word_counts(words):
+    return Counter(word.lower() for word in words)
+
+
+class PositionalIndex:
+    """
+    一次遍历建立倒排索引：单词 -> 编号 -> 出现位置（array存储的字符偏移）
+    同时记录每个单词第一次出现的句子，以及所在句子中最短的一句（至少MIN_EXAMPLE_WORDS个词）
+    """
+
+    TOKEN = re.compile(r"(?P<word>[a-zA-Z']+)|(?P<end>[.!?]+|\n\s*\n)")
+    MIN_EXAMPLE_WORDS = 4
+    MAX_EXAMPLE_LENGTH = 300
+
+    def __init__(self, text):
+        self.text = text
+        self.ids = {}
+        self.offsets = []
+        self.sentences = array('Q')  # 句子i的范围: sentences[2i] ~ sentences[2i+1]
+        self.first = array('l')
+        self.shortest = array('l')
+        self._build()
+
+    def _build(self):
+        ids, offsets, first, shortest, sentences = self.ids, self.offsets, self.first, self.shortest, self.sentences
+        sentence, start, length, seen = 0, 0, 0, set()
+        # 纯ASCII文本整体转小写，偏移不变，不必逐词转换
+        ascii_text = self.text.isascii()
+        text = self.text.lower() if ascii_text else self.text
+
+        def close(end):
+            nonlocal sentence, start, length
+            sentences.extend((start, end))
+            if length >= self.MIN_EXAMPLE_WORDS:
+                for word_id in seen:
+                    best = shortest[word_id]
+                    if best < 0 or end - start < sentences[2 * best + 1] - sentences[2 * best]:
+                        shortest[word_id] = sentence
+            seen.clear()
+            sentence += 1
+            start, length = end, 0
+
+        for match in self.TOKEN.finditer(text):
+            if match.lastindex == 2:
+                close(match.end())
+                continue
+            word = match.group() if ascii_text else match.group().lower()
+            word_id = ids.get(word)
+            if word_id is None:
+                word_id = ids[word] = len(offsets)
+                offsets.append(array('Q'))
+                first.append(sentence)
+                shortest.append(-1)
+            offsets[word_id].append(match.start())
+            seen.add(word_id)
+            length += 1
+        close(len(self.text))
+
+    def positions(self, word):
+        word_id = self.ids.get(word)
+        return self.offsets[word_id] if word_id is not None else array('Q')
+
+    def counts(self):
+        return Counter({word: len(self.offsets[word_id]) for word, word_id in self.ids.items()})
+
+    def sentence(self, i):
+        text = ' '.join(self.text[self.sentences[2 * i]:self.sentences[2 * i + 1]].split())
+        return text[:self.MAX_EXAMPLE_LENGTH]
+
+    def example(self, word, shortest=False):
+        word_id = self.ids.get(word)
+        if word_id is None:
+            return None
+        if shortest and self.shortest[word_id] >= 0:
+            return self.sentence(self.shortest[word_id])
+        return self.sentence(self.first[word_id])
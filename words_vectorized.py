@@ -0,0 +1,62 @@
+"""
+向量化的分词、清洗和词频统计，结果与words.parse_text + clean_words / get_word_counts一致（不统计空字符串）
+整篇文本按UTF-8字节交给NumPy：按字节判断字母和撇号、一次diff得到所有单词的起止位置，
+每个单词取成定长16字节的键，不超过8字节的单词按uint64排序计数，其余按16字节字符串排序计数，
+超过16字节的单词很少，逐个用Counter统计。分词和计数都不经过Python字符串列表
+适合大语料，小文章用words.py的循环版本即可
+
+"""
+from collections import Counter
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+WIDTH = 16  # 清洗后的单词不超过15个字母，定长键能容纳全部候选词
+
+
+def tokenize(text):
+    # 返回 (小写后的字节数组，非单词字节置0), 各单词起点, 各单词长度
+    data = np.frombuffer(text.encode('utf-8'), np.uint8)
+    lower = data | 0x20
+    letter = (lower >= ord('a')) & (lower <= ord('z'))
+    apostrophe = data == ord("'")
+    lowered = np.where(letter, lower, np.where(apostrophe, data, 0)).astype(np.uint8)
+    edges = np.flatnonzero(np.diff((letter | apostrophe).view(np.int8), prepend=np.int8(0), append=np.int8(0)))
+    starts, ends = edges[::2], edges[1::2]
+    return lowered, starts, ends - starts
+
+
+def _unique(keys, width):
+    # keys: 形状(n, 16)的uint8，返回 (单词列表, 次数列表)
+    if width == 8:
+        # 前8字节按大端解释为整数，整数顺序即字节顺序，排序比定长字符串快得多
+        values, counts = np.unique(keys[:, :8].copy().view('>u8').ravel(), return_counts=True)
+        words = values.astype('>u8').view('S8')
+    else:
+        words, counts = np.unique(keys.view(f'S{WIDTH}').ravel(), return_counts=True)
+    return [word.decode('ascii') for word in words.tolist()], counts.tolist()
+
+
+def count_tokens(lowered, starts, lengths):
+    padded = np.concatenate([lowered, np.zeros(WIDTH, np.uint8)])
+    short = lengths <= WIDTH
+    keys = sliding_window_view(padded, WIDTH)[starts[short]]
+    keys = keys * (np.arange(WIDTH) < lengths[short, None])
+
+    counts = Counter()
+    fits = lengths[short] <= 8
+    for part, width in ((keys[fits], 8), (keys[~fits], WIDTH)):
+        counts.update(dict(zip(*_unique(part, width))))
+    raw = lowered.tobytes()
+    counts.update(raw[start:start + length].decode('ascii')
+                  for start, length in zip(starts[~short].tolist(), lengths[~short].tolist()))
+    return counts
+
+
+def clean_counted(counts, known_words=frozenset()):
+    return sorted(word for word in counts if 2 < len(word) < WIDTH and word not in known_words)
+
+
+def clean_and_count_vectorized(text, known_words=frozenset()):
+    counts = count_tokens(*tokenize(text))
+    return clean_counted(counts, known_words), counts
@@ -0,0 +1,83 @@
+"""
+有道词典查询：请求页面、解析音标和释义
+有道改过页面结构，v1.0x和v2.0用的XPath不同，parse_page依次尝试各版本的解析方式
+请求有连接/读取超时，并通过hedge.Hedged对慢请求发出对冲请求
+请求在线程中进行，页面解析（etree.HTML + XPath，CPU密集）交给独立的解析进程池，不与网络线程争抢GIL
+
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import requests
+from lxml import etree
+
+from hedge import Hedged
+
+URL = 'https://www.youdao.com/w/eng/{}'
+TIMEOUT = (3.05, 10)  # 连接超时、读取超时（秒）
+PARSE_WORKERS = os.cpu_count() or 1
+
+_parser_pool = None
+_parser_pool_lock = threading.Lock()
+
+
+def fetch_page(word):
+    response = requests.get(URL.format(word), timeout=TIMEOUT)
+    response.raise_for_status()
+    return response.text
+
+
+hedged_fetch_page = Hedged(fetch_page)
+
+
+def parse_v2(html):
+    pronounce = html.xpath('//span[@class="pronounce"]/span/text()')
+    if len(pronounce) < 2:
+        return None
+    paraphrase = ''.join(html.xpath('//ul[@id="phrsListTab"]/li//text()'))
+    return pronounce[0], pronounce[1], paraphrase
+
+
+def parse_v1(html):
+    british_pronunciation = html.xpath('//*[@id="phrsListTab"]/h2/div/span[1]/span/text()')
+    american_pronunciation = html.xpath('//*[@id="phrsListTab"]/h2/div/span[2]/span/text()')
+    if not british_pronunciation or not american_pronunciation:
+        return None
+    paraphrase = ''.join(''.join(ul.xpath('.//text()')) for ul in html.xpath('//*[@id="phrsListTab"]/div/ul'))
+    return british_pronunciation[0], american_pronunciation[0], paraphrase
+
+
+# 新的页面结构放在前面
+PARSERS = [parse_v2, parse_v1]
+
+
+def parse_page(text):
+    html = etree.HTML(text)
+    if html is None:
+        return None
+    for parse in PARSERS:
+        word_info = parse(html)
+        if word_info:
+            return word_info
+    return None
+
+
+def parser_pool():
+    global _parser_pool
+    with _parser_pool_lock:
+        if _parser_pool is None:
+            # 第一次用到时已有查询线程在运行，fork会把其他线程持有的锁原样复制进子进程，改用spawn
+            _parser_pool = ProcessPoolExecutor(PARSE_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+        return _parser_pool
+
+
+def get_word_info(word, archive=None, offload=False):
+    # 查不到返回None，网络错误抛出异常；offload为True时在解析进程池中解析
+    text = hedged_fetch_page(word)
+    if archive is not None:
+        archive.put(word, text)
+    if offload:
+        return parser_pool().submit(parse_page, text).result()
+    return parse_page(text)